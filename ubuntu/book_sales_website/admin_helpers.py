@@ -27,17 +27,18 @@ def get_admin_stats():
     Returns:
         dict: Dictionary containing statistics
     """
-    from database_schema import User, Book, Order, Payment
+    from sqlalchemy import func
+    from database_schema import db, User, Book, Order, Payment
     
-    total_books = Book.query.count()
-    total_users = User.query.count()
-    total_orders = Order.query.count()
+    # Plain COUNT(*) / SUM() queries, no row loading
+    total_books = db.session.query(func.count(Book.id)).scalar()
+    total_users = db.session.query(func.count(User.id)).scalar()
+    total_orders = db.session.query(func.count(Order.id)).scalar()
     
     # Calculate total revenue
-    total_revenue = 0
-    payments = Payment.query.filter_by(status='completed').all()
-    for payment in payments:
-        total_revenue += payment.amount
+    total_revenue = db.session.query(
+        func.coalesce(func.sum(Payment.amount), 0)
+    ).filter(Payment.status == 'completed').scalar()
     
     return {
         'total_books': total_books,
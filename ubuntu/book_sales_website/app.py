@@ -16,16 +16,15 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 from datetime import datetime
 import json
-import uuid
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 # Import database models
-from database_schema import db, User, Book, Order, OrderItem, Payment, Download
+from database_schema import db, enable_sqlite_wal, User, Book, Order, OrderItem, Payment, Download
 from paypal_helpers import create_payment, execute_payment as paypal_execute_payment, get_payment_details
-from pdf_helpers import purchase_required, record_download, get_download_path, generate_secure_filename, extract_pdf_metadata
+from pdf_helpers import purchase_required, record_download, get_download_path, accel_redirect_response, generate_secure_filename, extract_pdf_metadata
 from pdf_cleaner import clean_pdf_auto, detect_watermark_pages
 from admin_helpers import admin_required, get_admin_stats
 from pdf_thumbnail import generate_pdf_thumbnail
@@ -65,6 +64,10 @@ app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__fil
 app.config['PDF_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static/pdfs')
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB max upload size
 app.config['TEMPLATES_AUTO_RELOAD'] = True  # Force template reloading
+# Let a front-end web server (Apache mod_xsendfile, lighttpd) stream PDF downloads
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', 'false').lower() in ('1', 'true', 'yes')
+# Internal nginx location that maps onto PDF_FOLDER, e.g. /protected_pdfs/ (empty = off)
+app.config['PDF_ACCEL_REDIRECT_PREFIX'] = os.environ.get('PDF_ACCEL_REDIRECT_PREFIX', '')
 
 # Ensure upload directories exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -72,6 +75,8 @@ os.makedirs(app.config['PDF_FOLDER'], exist_ok=True)
 
 # Initialize database
 db.init_app(app)
+with app.app_context():
+    enable_sqlite_wal(db.engine)
 
 # Initialize login manager
 login_manager = LoginManager()
@@ -618,18 +623,19 @@ def download_book(book_id, order_id):
     is_admin = current_user.email == 'admin@example.com'  # You can make this more sophisticated
     
     if not is_admin:
-        # For regular users, check download limit (1 download per book per order)
-        existing_downloads = Download.query.filter_by(
+        # For regular users, check download limit (1 download per book per order);
+        # fetching a single id is enough, no need to count every row
+        existing_download = db.session.query(Download.id).filter_by(
             user_id=current_user.id,
             book_id=book.id,
             order_id=order_id
-        ).count()
+        ).first()
         
-        if existing_downloads >= 1:
+        if existing_download is not None:
             flash('Download limit reached. You have already downloaded this book once. Contact support if you need help.', 'warning')
             return redirect(url_for('account'))
     
-    # Record the download
+    # Record the download before streaming so the DB write isn't tied to the transfer
     record_download(
         user_id=current_user.id,
         book_id=book.id,
@@ -637,14 +643,20 @@ def download_book(book_id, order_id):
         ip_address=request.remote_addr
     )
     
+    # Behind nginx, let it stream the file from its internal location
+    if app.config['PDF_ACCEL_REDIRECT_PREFIX']:
+        return accel_redirect_response(book, f"{book.title}.pdf")
+    
     # Get the file path
     pdf_path = get_download_path(book)
     
-    # Send the file
+    # Send the file (conditional enables Range/If-Modified-Since; with
+    # USE_X_SENDFILE the web server sends the bytes instead of the worker)
     return send_file(
         pdf_path,
         as_attachment=True,
-        download_name=f"{book.title}.pdf"
+        download_name=f"{book.title}.pdf",
+        conditional=True
     )
 
 # User account routes
@@ -862,7 +874,7 @@ def admin_add_book():
                 
                 # Auto-generate thumbnail from PDF if no cover image provided
                 if not cover_image:
-                    thumbnail_filename = os.path.splitext(filename)[0] + '_thumb.png'
+                    thumbnail_filename = os.path.splitext(filename)[0] + '_thumb.jpg'
                     thumbnail_path = os.path.join(app.config['UPLOAD_FOLDER'], thumbnail_filename)
                     if generate_pdf_thumbnail(file_path, thumbnail_path):
                         cover_image = thumbnail_filename
@@ -944,7 +956,7 @@ def admin_edit_book(book_id):
                 
                 # Always regenerate thumbnail from current PDF
                 old_cover = book.cover_image
-                thumbnail_filename = f"thumb_{os.path.basename(book.pdf_file)}.png"
+                thumbnail_filename = f"thumb_{os.path.basename(book.pdf_file)}.jpg"
                 thumbnail_path = os.path.join(app.config['UPLOAD_FOLDER'], thumbnail_filename)
                 
                 if generate_pdf_thumbnail(pdf_path, thumbnail_path):
@@ -1007,7 +1019,7 @@ def admin_edit_book(book_id):
                 
                 # Auto-generate thumbnail from new PDF if no cover image was uploaded
                 if 'cover_image' not in request.files or not request.files['cover_image'].filename:
-                    thumbnail_filename = os.path.splitext(filename)[0] + '_thumb.png'
+                    thumbnail_filename = os.path.splitext(filename)[0] + '_thumb.jpg'
                     thumbnail_path = os.path.join(app.config['UPLOAD_FOLDER'], thumbnail_filename)
                     if generate_pdf_thumbnail(file_path, thumbnail_path):
                         book.cover_image = thumbnail_filename
@@ -1096,7 +1108,7 @@ def admin_clean_pdf(book_id):
                         pass  # Ignore if file is locked
             
             # Generate new thumbnail
-            thumbnail_filename = f"thumb_{os.path.basename(book.pdf_file)}.png"
+            thumbnail_filename = f"thumb_{os.path.basename(book.pdf_file)}.jpg"
             thumbnail_path = os.path.join(app.config['UPLOAD_FOLDER'], thumbnail_filename)
             if generate_pdf_thumbnail(pdf_path, thumbnail_path):
                 book.cover_image = thumbnail_filename
@@ -1246,7 +1258,7 @@ def admin_remove_pdf_page(book_id, page_num):
                     pass
         
         # Generate new thumbnail
-        thumbnail_filename = f"thumb_{os.path.basename(book.pdf_file)}.png"
+        thumbnail_filename = f"thumb_{os.path.basename(book.pdf_file)}.jpg"
         thumbnail_path = os.path.join(app.config['UPLOAD_FOLDER'], thumbnail_filename)
         if generate_pdf_thumbnail(pdf_path, thumbnail_path):
             book.cover_image = thumbnail_filename
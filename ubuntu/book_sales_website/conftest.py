@@ -0,0 +1,244 @@
+"""
+Shared pytest fixtures for the Book Sales Website tests
+
+The app is configured once per test session against an in-memory SQLite
+database (DATABASE_URI must be set before app.py is imported). Schema and
+seed data are created once; each test that uses the ``session`` fixture runs
+inside a transaction that is rolled back afterwards, so tests never see each
+other's writes.
+"""
+
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+from flask_sqlalchemy.session import Session as FlaskSession
+
+# app.py (and reset_admin.py) read DATABASE_URI when they are imported, so
+# it has to be set before anything imports them. Test modules that import the
+# app at top level repeat it with setdefault() so they also work when run
+# directly with "python test_x.py", where this file is only loaded later.
+os.environ['DATABASE_URI'] = 'sqlite://'
+
+from app import app, db
+from database_schema import User, Book
+from werkzeug.security import generate_password_hash
+
+SeedData = namedtuple('SeedData', 'user_id book_id book_price')
+
+# Low-iteration hash so seeding doesn't pay for a production-strength KDF;
+# check_password_hash reads the method from the hash itself
+_TEST_PW_HASH = generate_password_hash('password', method='pbkdf2:sha256:1000')
+
+
+def _require_in_memory_db(engine):
+    """Refuse to run tests against anything but an in-memory SQLite database"""
+    if engine.url.database not in (None, '', ':memory:'):
+        raise RuntimeError(f"Unsafe test DB target: expected in-memory SQLite, got '{engine.url}'.")
+
+
+class _ConnectionSession(FlaskSession):
+    """Session that always uses the test connection it was created with"""
+
+    def get_bind(self, *args, **kwargs):
+        return self.bind
+
+
+def _use_sqlite_transactions(engine):
+    """
+    Let SQLite SAVEPOINTs nest inside an outer transaction.
+
+    pysqlite only emits BEGIN lazily before DML, which breaks SAVEPOINT
+    handling; turn that off and emit BEGIN whenever SQLAlchemy starts a
+    transaction (SQLAlchemy's documented pysqlite workaround).
+    """
+    @event.listens_for(engine, 'connect')
+    def _disable_pysqlite_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def _emit_begin(connection):
+        connection.exec_driver_sql('BEGIN')
+
+    # The in-memory database lives on one pooled connection that may already
+    # be open, so adjust it directly as well
+    raw_connection = engine.raw_connection()
+    raw_connection.driver_connection.isolation_level = None
+    raw_connection.close()
+
+
+def _seed(pdf_folder):
+    """Create the users, books and PDF files every test starts from"""
+    user = User(
+        email='test@example.com',
+        password=_TEST_PW_HASH,
+        name='Test User'
+    )
+    book = Book(
+        title='Test Book 1',
+        author='Test Author 1',
+        description='This is a test book 1',
+        price=9.99,
+        pdf_file='test_book1.pdf',
+        is_available=True
+    )
+    db.session.add_all([
+        user,
+        book,
+        Book(
+            title='Test Book 2',
+            author='Test Author 2',
+            description='This is a test book 2',
+            price=14.99,
+            pdf_file='test_book2.pdf',
+            is_available=True
+        ),
+    ])
+
+    for filename, content in (('test_book1.pdf', 'Test PDF content for book 1'),
+                              ('test_book2.pdf', 'Test PDF content for book 2')):
+        with open(os.path.join(pdf_folder, filename), 'w') as f:
+            f.write(content)
+
+    db.session.commit()
+    return SeedData(user.id, book.id, book.price)
+
+
+@pytest.fixture(scope='session')
+def _scratch_dir(tmp_path_factory):
+    """
+    Session-wide folder for uploads and PDFs; on tmpfs (/dev/shm) when it is
+    available so test files never reach the disk
+    """
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        path = Path(tempfile.mkdtemp(prefix='booksales-', dir='/dev/shm'))
+        yield path
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        yield tmp_path_factory.mktemp('booksales')
+
+
+@pytest.fixture(scope='session')
+def app_fx(_scratch_dir):
+    """The Flask app, configured for testing with an empty in-memory schema"""
+    saved_config = {key: app.config.get(key) for key in ('TESTING', 'WTF_CSRF_ENABLED', 'UPLOAD_FOLDER', 'PDF_FOLDER')}
+    app.config.update(
+        TESTING=True,
+        WTF_CSRF_ENABLED=False,
+        UPLOAD_FOLDER=str(_scratch_dir / 'uploads'),
+        PDF_FOLDER=str(_scratch_dir / 'pdfs'),
+    )
+    os.makedirs(app.config['UPLOAD_FOLDER'])
+    os.makedirs(app.config['PDF_FOLDER'])
+
+    with app.app_context():
+        _require_in_memory_db(db.engine)
+        _use_sqlite_transactions(db.engine)
+        db.create_all()
+
+    yield app
+
+    app.config.update(saved_config)
+
+
+@pytest.fixture(scope='session')
+def seed(app_fx):
+    """IDs (and the price) of the seeded user and first book, created once"""
+    with app_fx.app_context():
+        seed_data = _seed(app_fx.config['PDF_FOLDER'])
+        db.session.remove()
+    return seed_data
+
+
+@pytest.fixture
+def reset_admin_db():
+    """
+    Fresh schema in reset_admin.py's own app, which has a separate in-memory
+    database from the main app; dropped again after the test
+    """
+    import reset_admin
+
+    with reset_admin.app.app_context():
+        _require_in_memory_db(db.engine)
+        db.create_all()
+        yield
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def app_ctx(app_fx):
+    """
+    An application context for the length of one test, for tests that use the
+    models directly. Tests that go through ``client`` must not use it: requests
+    reuse an already-pushed context, so ``g`` (and Flask-Login's current user)
+    would carry over from one request to the next.
+    """
+    with app_fx.app_context():
+        yield
+
+
+@pytest.fixture
+def session(app_fx, seed):
+    """
+    Route db.session through one connection whose transaction is rolled back
+    after the test. Commits made by the app only release a SAVEPOINT.
+    """
+    with app_fx.app_context():
+        connection = db.engine.connect()
+    transaction = connection.begin()
+
+    original_session = db.session
+    db.session = db._make_scoped_session({
+        'class_': _ConnectionSession,
+        'bind': connection,
+        'join_transaction_mode': 'create_savepoint',
+    })
+
+    yield db.session
+
+    with app_fx.app_context():
+        db.session.remove()
+    db.session = original_session
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture(scope='session')
+def _shared_client(app_fx):
+    return app_fx.test_client()
+
+
+@pytest.fixture
+def client(app_fx, session, _shared_client):
+    """
+    The session-wide test client, logged out and with an empty cart; its
+    requests share the test's rolled-back transaction
+    """
+    for cookie_name in (app_fx.config['SESSION_COOKIE_NAME'],
+                        app_fx.config.get('REMEMBER_COOKIE_NAME', 'remember_token')):
+        _shared_client.delete_cookie(cookie_name)
+    return _shared_client
+
+
+@pytest.fixture
+def make_pdf():
+    """
+    Factory writing a small PDF with one page per given text (one default
+    page if none) and returning its path as a string
+    """
+    fitz = pytest.importorskip('fitz')
+
+    def _make_pdf(path, *page_texts):
+        doc = fitz.open()
+        for text in page_texts or ('Test PDF content',):
+            doc.new_page().insert_text((72, 72), text)
+        doc.save(path)
+        doc.close()
+        return str(path)
+
+    return _make_pdf
@@ -11,12 +11,30 @@ This module defines the database models for:
 
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy import event
 from datetime import datetime, timezone
-import uuid
+import sqlite3
+import secrets
 
 db = SQLAlchemy()
 
 
+def enable_sqlite_wal(engine):
+    """
+    Put new connections of ``engine`` (if it is SQLite) in WAL mode with
+    synchronous=NORMAL so small request-path commits (e.g. download records)
+    don't wait on an fsync. The database stays consistent, but a power loss or
+    OS crash can lose the most recent commits, orders and payments included.
+    """
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        if isinstance(dbapi_connection, sqlite3.Connection):
+            cursor = dbapi_connection.cursor()
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA synchronous=NORMAL')
+            cursor.close()
+
+
 def utc_now():
     return datetime.now(timezone.utc)
 
@@ -85,7 +103,7 @@ class Order(db.Model):
     
     # Unique order reference for tracking
     order_reference = db.Column(db.String(50), unique=True, nullable=False, 
-                               default=lambda: str(uuid.uuid4())[:8].upper())
+                               default=lambda: secrets.token_hex(4).upper())
     
     # Relationships
     items = db.relationship('OrderItem', backref='order', lazy=True, cascade="all, delete-orphan")
@@ -97,6 +115,9 @@ class Order(db.Model):
 class OrderItem(db.Model):
     """OrderItem model for individual books in an order"""
     __tablename__ = 'order_items'
+    __table_args__ = (
+        db.Index('ix_order_item_order_id_book_id', 'order_id', 'book_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
@@ -125,6 +146,12 @@ class Payment(db.Model):
 class Download(db.Model):
     """Download model for tracking book downloads after purchase"""
     __tablename__ = 'downloads'
+    __table_args__ = (
+        db.Index('ix_download_book_id', 'book_id'),
+        db.Index('ix_download_user_id_date', 'user_id', 'download_date'),
+        # Per-order download limit check and Order.downloads
+        db.Index('ix_download_order_user_book', 'order_id', 'user_id', 'book_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
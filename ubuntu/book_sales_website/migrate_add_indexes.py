@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Migration script to add missing indexes to existing tables
+
+db.create_all() only creates indexes for tables it creates, so databases
+created before an index was declared on a model need this script.
+"""
+
+from app import app, db
+
+def migrate_add_indexes():
+    """Create any model-declared index that is missing from the database"""
+    with app.app_context():
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                try:
+                    index.create(db.engine, checkfirst=True)
+                    print(f"✅ Index {index.name} on {table.name} is in place")
+                except Exception as e:
+                    print(f"❌ Error creating index {index.name}: {e}")
+
+if __name__ == "__main__":
+    migrate_add_indexes()
@@ -6,16 +6,31 @@ and PDF metadata extraction.
 """
 
 import os
-import uuid
 import re
-from flask import send_file, abort, current_app
+import pickle
+import secrets
+import sqlite3
+import contextvars
+import unicodedata
+from urllib.parse import quote
+import tempfile
+import logging
+from logging.handlers import MemoryHandler
+from flask import send_file, abort, current_app, Response
 from flask_login import current_user
+from sqlalchemy import func
 from datetime import datetime, timezone
 from functools import wraps
+from contextlib import closing
+
+logger = logging.getLogger(__name__)
 
 try:
     import fitz  # PyMuPDF
     PYMUPDF_AVAILABLE = True
+    
+    # 2x zoom used when rendering pages for OCR (better recognition quality)
+    _OCR_MATRIX = fitz.Matrix(2.0, 2.0)
 except ImportError:
     PYMUPDF_AVAILABLE = False
 
@@ -23,6 +38,7 @@ try:
     import pytesseract
     from PIL import Image
     from langdetect import detect, DetectorFactory
+    DetectorFactory.seed = 0  # Consistent langdetect results
     OCR_AVAILABLE = True
     
     # Configure Tesseract path for Windows
@@ -39,15 +55,117 @@ try:
             if os.path.exists(path):
                 pytesseract.pytesseract.tesseract_cmd = path
                 tesseract_found = True
-                print(f"✓ Tesseract found at: {path}")
+                logger.info("Tesseract found at: %s", path)
                 break
         if not tesseract_found:
-            print("⚠ Tesseract executable not found in common paths")
+            logger.warning("Tesseract executable not found in common paths")
 except ImportError as e:
     OCR_AVAILABLE = False
-    print(f"⚠ OCR libraries not available: {e}")
+    logger.warning("OCR libraries not available: %s", e)
+
+try:
+    import gcld3  # Compiled CLD3 model, much faster than langdetect
+    LANGUAGE_IDENTIFIER = gcld3.NNetLanguageIdentifier(min_num_bytes=50, max_num_bytes=1000)
+except ImportError:
+    LANGUAGE_IDENTIFIER = None
 
 from database_schema import db, User, Book, Order, OrderItem, Payment, Download
+from pdf_thumbnail import file_sha256
+
+# Extraction trace written to debug_ocr.log (Flask swallows print statements).
+# Records are buffered in memory and flushed once per extraction instead of
+# reopening the file for every line.
+_ocr_log = logging.getLogger('pdf_ocr')
+_ocr_log.setLevel(logging.INFO)
+_ocr_log.propagate = False
+if not _ocr_log.handlers:
+    _ocr_file_handler = logging.FileHandler('debug_ocr.log', encoding='utf-8', delay=True)
+    _ocr_file_handler.setFormatter(logging.Formatter('%(message)s'))
+    _ocr_log.addHandler(MemoryHandler(capacity=1000, flushLevel=logging.ERROR, target=_ocr_file_handler))
+
+def _flush_ocr_log():
+    """Write any buffered extraction trace records to debug_ocr.log"""
+    for handler in _ocr_log.handlers:
+        handler.flush()
+
+# ISBN-10/13 as printed on covers and copyright pages
+_ISBN_RE = re.compile(r'ISBN[:\s-]*([0-9]{13}|[0-9]{10}|[0-9\-]{10,17})', re.IGNORECASE)
+
+_DOI_RE = re.compile(r'DOI[:\s]*([0-9]{2}\.[0-9]{4,}/[^\s]+)', re.IGNORECASE)
+
+# Separators dropped when normalising an ISBN
+_ISBN_STRIP = str.maketrans('', '', '- ')
+
+# Common OCR misreadings of publisher names on covers, applied in one pass
+_PUBLISHER_FIXES = {
+    'me OSBORNE': 'McGraw-Hill/Osborne',
+    'OSBORNE': 'McGraw-Hill/Osborne',
+    'me ': '',
+}
+_PUBLISHER_FIX_RE = re.compile('|'.join(re.escape(fix) for fix in _PUBLISHER_FIXES))
+
+# Publisher names looked for in (lowercased) cover text
+_COVER_PUBLISHER_RE = re.compile('|'.join(re.escape(kw) for kw in [
+    'osborne', 'press', 'publishing', 'books', 'mcgraw', 'wiley', 'oreilly', "o'reilly",
+    'pearson', 'apress', 'manning', 'packt', 'springer', 'elsevier'
+]))
+
+# TOC leader characters (dots, underscores, dashes), deleted to count them
+_TOC_CHARS = str.maketrans('', '', '._-')
+
+# Page number (or other number) at the end of a TOC/header line
+_TRAILING_NUMBER_RE = re.compile(r'\d+\s*$')
+
+# Deletes every ASCII character that is not a letter
+_ASCII_NON_ALPHA = str.maketrans('', '', ''.join(chr(i) for i in range(128) if not chr(i).isalpha()))
+
+# Chapter/section numbering at the start of a line (e.g. "1.2", "2.1", "Chapter 3")
+_CHAPTER_NUMBER_RE = re.compile(r'^\s*(\d+\.?\d*\s+|Chapter\s+\d+|CHAPTER\s+\d+)')
+
+# Publication date patterns for copyright pages, most specific first
+_DATE_PATTERNS = [(re.compile(pattern, re.IGNORECASE), format_type) for pattern, format_type in [
+    # Full date patterns
+    (r'(?:Published|First published|Copyright|©)\s*(?:on\s*)?(\d{1,2})[\/\-\s]+(\w+)[\/\-\s]+([12]\d{3})', 'dmy'),  # DD Month YYYY
+    (r'(?:Published|First published|Copyright|©)\s*(?:on\s*)?(\w+)\s+(\d{1,2})[,\s]+([12]\d{3})', 'mdy'),  # Month DD, YYYY
+    (r'(?:Published|First published|Copyright|©)\s*(?:on\s*)?(\d{1,2})[\/\-](\d{1,2})[\/\-]([12]\d{3})', 'dmy_numeric'),  # DD/MM/YYYY
+    # Year-only patterns (fallback)
+    (r'(?:Published|First published|Copyright|©)\s*(?:in\s*)?([12]\d{3})', 'year_only'),
+    (r'([12]\d{3})\s*(?:by|publication)', 'year_only'),
+    (r'Edition\s*[^0-9]*([12]\d{3})', 'year_only')
+]]
+
+# Month name (or its first three letters) to month number
+_MONTHS = {
+    'january': '01', 'february': '02', 'march': '03', 'april': '04',
+    'may': '05', 'june': '06', 'july': '07', 'august': '08',
+    'september': '09', 'october': '10', 'november': '11', 'december': '12',
+    'jan': '01', 'feb': '02', 'mar': '03', 'apr': '04',
+    'jun': '06', 'jul': '07', 'aug': '08', 'sep': '09',
+    'oct': '10', 'nov': '11', 'dec': '12'
+}
+
+# Language-detection clean-up: keep only ASCII letters, collapse whitespace
+_NON_LETTER_RE = re.compile(r'[^a-zA-Z\s]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Section headings that mark an introduction page, in order of preference
+_INTRO_KEYWORDS = ['introduction', 'preface', 'overview', 'summary', 'abstract', 'foreword', 'about this book']
+_INTRO_RE = re.compile('|'.join(re.escape(kw) for kw in _INTRO_KEYWORDS), re.IGNORECASE)
+_INTRO_KEYWORD_RES = {kw: re.compile(re.escape(kw), re.IGNORECASE) for kw in _INTRO_KEYWORDS}
+
+# Headings that name a section rather than the book/paper itself
+_SECTION_HEADING_RE = re.compile('|'.join(re.escape(kw) for kw in [
+    'about this book', 'about the', 'preface', 'foreword', 'contents', 'table of', 'summary', 'abstract'
+]), re.IGNORECASE)
+
+# Words that mark table-of-contents / front-matter navigation lines
+_TOC_KEYWORD_RE = re.compile('|'.join(re.escape(kw) for kw in [
+    'contents', 'acknowledgment', 'foreword', 'preface', 'introduction',
+    'appendix', 'glossary', 'index', 'part 1', 'part 2', 'part 3',
+    'about this book', 'about the book'
+]), re.IGNORECASE)
+
+_ACKNOWLEDGMENT_RE = re.compile('acknowledgment', re.IGNORECASE)
 
 def purchase_required(f):
     """
@@ -60,23 +178,17 @@ def purchase_required(f):
         if current_user.is_admin:
             return f(book_id, order_id, *args, **kwargs)
         
-        # Check if the user has purchased this book
-        order = Order.query.filter_by(
-            id=order_id, 
-            user_id=current_user.id, 
-            status='completed'
-        ).first()
+        # Check if the user has a completed order containing this book
+        purchased = db.session.query(OrderItem.id).join(
+            Order, Order.id == OrderItem.order_id
+        ).filter(
+            Order.id == order_id,
+            Order.user_id == current_user.id,
+            Order.status == 'completed',
+            OrderItem.book_id == book_id
+        ).first() is not None
         
-        if not order:
-            abort(403)  # Forbidden
-        
-        # Check if the book is in this order
-        order_item = OrderItem.query.filter_by(
-            order_id=order.id, 
-            book_id=book_id
-        ).first()
-        
-        if not order_item:
+        if not purchased:
             abort(403)  # Forbidden
             
         return f(book_id, order_id, *args, **kwargs)
@@ -121,17 +233,56 @@ def get_download_path(book):
     pdf_folder = current_app.config['PDF_FOLDER']
     return os.path.join(pdf_folder, book.pdf_file)
 
-def get_user_downloads(user_id):
+def accel_redirect_response(book, download_name):
+    """
+    Hand a PDF download to nginx with an X-Accel-Redirect header.
+    
+    The response has no body; nginx serves book.pdf_file from the internal
+    location configured as PDF_ACCEL_REDIRECT_PREFIX. The Content-Disposition
+    header is built the same way Flask's send_file builds it, including the
+    RFC 5987 form for non-ASCII titles.
+    
+    Args:
+        book (Book): Book object
+        download_name (str): File name offered to the browser
+        
+    Returns:
+        Response: Empty response carrying the redirect headers
+    """
+    prefix = current_app.config['PDF_ACCEL_REDIRECT_PREFIX'].rstrip('/')
+    response = Response(mimetype='application/pdf')
+    response.headers['X-Accel-Redirect'] = f"{prefix}/{quote(book.pdf_file)}"
+    
+    try:
+        download_name.encode('ascii')
+        disposition = {'filename': download_name}
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+        disposition = {
+            'filename': simple,
+            'filename*': f"UTF-8''{quote(download_name, safe='!#$&+^`|~')}"
+        }
+    response.headers.set('Content-Disposition', 'attachment', **disposition)
+    return response
+
+def get_user_downloads(user_id, limit=None, offset=0):
     """
-    Get all downloads for a user
+    Get downloads for a user, most recent first
     
     Args:
         user_id (int): User ID
+        limit (int, optional): Maximum number of downloads to return (all if None)
+        offset (int, optional): Number of downloads to skip
         
     Returns:
         list: List of Download objects
     """
-    return Download.query.filter_by(user_id=user_id).all()
+    query = Download.query.filter_by(user_id=user_id).order_by(Download.download_date.desc())
+    if offset:
+        query = query.offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
 
 def get_book_download_count(book_id):
     """
@@ -143,7 +294,7 @@ def get_book_download_count(book_id):
     Returns:
         int: Number of downloads
     """
-    return Download.query.filter_by(book_id=book_id).count()
+    return db.session.query(func.count(Download.id)).filter(Download.book_id == book_id).scalar()
 
 def generate_secure_filename(original_filename):
     """
@@ -153,25 +304,27 @@ def generate_secure_filename(original_filename):
         original_filename (str): Original filename
         
     Returns:
-        str: Secure filename with UUID
+        str: Secure filename made of 32 random hex characters
     """
     # Get file extension
     _, ext = os.path.splitext(original_filename)
     
-    # Generate a UUID
-    unique_id = str(uuid.uuid4())
+    # 128 random bits as hex, straight from the CSPRNG
+    unique_id = secrets.token_hex(16)
     
     # Create a secure filename
     secure_filename = f"{unique_id}{ext}"
     
     return secure_filename
 
-def extract_text_from_cover(pdf_path):
+def extract_text_from_cover(pdf_path, doc=None):
     """
     Extract text from PDF cover using OCR.
     
     Args:
         pdf_path (str): Path to the PDF file
+        doc (fitz.Document, optional): Already open document for pdf_path;
+            it is left open for the caller
         
     Returns:
         str: Extracted text from cover
@@ -179,8 +332,10 @@ def extract_text_from_cover(pdf_path):
     if not PYMUPDF_AVAILABLE or not OCR_AVAILABLE:
         return ''
     
+    owns_doc = doc is None
     try:
-        doc = fitz.open(pdf_path)
+        if owns_doc:
+            doc = fitz.open(pdf_path)
         if len(doc) == 0:
             return ''
         
@@ -188,8 +343,7 @@ def extract_text_from_cover(pdf_path):
         page = doc[0]
         
         # Render page to image at higher resolution for better OCR
-        mat = fitz.Matrix(2.0, 2.0)  # 2x zoom for better quality
-        pix = page.get_pixmap(matrix=mat)
+        pix = page.get_pixmap(matrix=_OCR_MATRIX)
         
         # Convert to PIL Image
         img_data = pix.tobytes("png")
@@ -199,13 +353,51 @@ def extract_text_from_cover(pdf_path):
         # Extract text using OCR
         text = pytesseract.image_to_string(img)
         
-        doc.close()
+        if owns_doc:
+            doc.close()
         return text
         
     except Exception as e:
-        print(f"Error extracting text from cover: {e}")
+        logger.warning("Error extracting text from cover: %s", e)
+        _mark_uncacheable('cover OCR failed')
         return ''
 
+def ocr_pages(doc, page_numbers):
+    """
+    OCR several PDF pages with a single Tesseract run.
+    
+    The pages are rendered to PNGs in a temporary directory and Tesseract is
+    given a list file naming them, so its start-up cost is paid once instead
+    of once per page.
+    
+    Args:
+        doc (fitz.Document): Open PDF document
+        page_numbers (list): Zero-based page numbers to OCR
+        
+    Returns:
+        list: OCR text for each requested page, in the same order
+    """
+    if not page_numbers:
+        return []
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        image_paths = []
+        for page_num in page_numbers:
+            pix = doc[page_num].get_pixmap(matrix=_OCR_MATRIX)
+            image_path = os.path.join(tmp_dir, f"page_{page_num + 1}.png")
+            pix.save(image_path)
+            image_paths.append(image_path)
+        
+        list_path = os.path.join(tmp_dir, 'pages.txt')
+        with open(list_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(image_paths) + '\n')
+        
+        text = pytesseract.image_to_string(list_path)
+    
+    # Tesseract ends each page's text with a form feed
+    page_texts = text.split('\x0c')
+    return (page_texts + [''] * len(page_numbers))[:len(page_numbers)]
+
 def parse_cover_text(text):
     """
     Parse extracted cover text to find title, author, ISBN, and publisher.
@@ -249,16 +441,6 @@ def parse_cover_text(text):
             return False
         return True
     
-    # ISBN extraction
-    isbn_pattern = r'ISBN[:\s-]*([0-9]{13}|[0-9]{10}|[0-9\-]{10,17})'
-    for line in lines:
-        isbn_match = re.search(isbn_pattern, line, re.IGNORECASE)
-        if isbn_match:
-            isbn = isbn_match.group(1).replace('-', '').replace(' ', '')
-            if len(isbn) in [10, 13]:
-                metadata['isbn'] = isbn
-                break
-    
     # Title extraction - combine first 1-3 lines that aren't author names
     title_lines = []
     author_start_index = 0
@@ -281,20 +463,36 @@ def parse_cover_text(text):
         if len(potential_title) > 5 and not any(kw in potential_title.lower() for kw in publisher_keywords):
             metadata['title'] = potential_title
     
-    # Author detection (look for common patterns)
+    # Single pass over the lines for ISBN, author keyword and publisher
     author_keywords = ['by', 'author', 'written by']
     for i, line in enumerate(lines):
         line_lower = line.lower()
-        for keyword in author_keywords:
-            if keyword in line_lower:
-                # Author might be on same line or next line
-                author = line.replace(keyword, '').replace(':', '').strip()
-                if not author and i + 1 < len(lines):
-                    author = lines[i + 1]
-                if author:
-                    metadata['author'] = author
-                    break
-        if metadata['author']:
+        
+        # ISBN extraction
+        if not metadata['isbn']:
+            isbn_match = _ISBN_RE.search(line)
+            if isbn_match:
+                isbn = isbn_match.group(1).translate(_ISBN_STRIP)
+                if len(isbn) in [10, 13]:
+                    metadata['isbn'] = isbn
+        
+        # Author detection (look for common patterns)
+        if not metadata['author']:
+            for keyword in author_keywords:
+                if keyword in line_lower:
+                    # Author might be on same line or next line
+                    author = line.replace(keyword, '').replace(':', '').strip()
+                    if not author and i + 1 < len(lines):
+                        author = lines[i + 1]
+                    if author:
+                        metadata['author'] = author
+                        break
+        
+        # Publisher, cleaning up common OCR errors
+        if not metadata['publisher'] and _COVER_PUBLISHER_RE.search(line_lower):
+            metadata['publisher'] = _PUBLISHER_FIX_RE.sub(lambda m: _PUBLISHER_FIXES[m.group(0)], line.strip())
+        
+        if metadata['isbn'] and metadata['author'] and metadata['publisher']:
             break
     
     # If no "by" keyword, look for author name(s) in lines after title
@@ -313,25 +511,506 @@ def parse_cover_text(text):
         if authors:
             metadata['author'] = ', '.join(authors)
     
-    # Extract publisher from lines after author
-    publisher_keywords = ['osborne', 'press', 'publishing', 'books', 'mcgraw', 'wiley', 'oreilly', "o'reilly", 'pearson', 'apress', 'manning', 'packt', 'springer', 'elsevier']
+    return metadata
+
+def _extract_title_from_title_page(doc, metadata):
+    """
+    Take the title from page 2 (the title page) when the PDF metadata and
+    cover OCR gave none.
     
-    for line in lines:
-        line_lower = line.lower()
-        for keyword in publisher_keywords:
-            if keyword in line_lower:
-                # Clean up common OCR errors
-                publisher = line.strip()
-                publisher = publisher.replace('me OSBORNE', 'McGraw-Hill/Osborne')
-                publisher = publisher.replace('OSBORNE', 'McGraw-Hill/Osborne')
-                publisher = publisher.replace('me ', '')
-                metadata['publisher'] = publisher
-                break
-        if metadata['publisher']:
+    Args:
+        doc (fitz.Document): Open PDF document
+        metadata (dict): Metadata being extracted, updated in place
+    """
+    try:
+        logger.debug("Searching for title on page 2 (title page)...")
+        _ocr_log.info("\n📖 Searching for title on page 2 (title page)...")
+        
+        if len(doc) > 1:  # Check if page 2 exists
+            page_text = doc[1].get_text()  # Page 2 is index 1
+            lines = [line.strip() for line in page_text.split('\n') if line.strip()]
+            
+            _ocr_log.info(f"Page 2 has {len(lines)} lines of text")
+            
+            # Look for title in first 10 lines of page 2
+            publisher_keywords = ['manning', 'press', 'publishing', 'publisher', 'ebook', 'provided']
+            for i, line in enumerate(lines[:10]):
+                # Skip very short lines (likely page numbers)
+                if len(line) < 10:
+                    continue
+                
+                # Skip lines with mostly lowercase (likely descriptions)
+                if sum(c.islower() for c in line) > len(line) * 0.7:
+                    continue
+                
+                # Skip publisher names
+                if any(kw in line.lower() for kw in publisher_keywords):
+                    _ocr_log.info(f"Skipping publisher line: '{line}'")
+                    continue
+                
+                # Good candidate if it's Title Case or ALL CAPS, reasonable length
+                if 10 <= len(line) <= 150:
+                    # Check if it looks like a title (not URL, email, etc.)
+                    if not any(x in line for x in ['http://', 'https://', '@', 'www.']):
+                        metadata['title'] = line
+                        logger.debug("Title from page 2: %s", metadata['title'])
+                        _ocr_log.info(f"✓ Extracted title from page 2: {metadata['title']}")
+                        break
+    except Exception as e:
+        logger.warning("Error extracting title from page 2: %s", e)
+        _ocr_log.error(f"Error extracting title from page 2: {e}")
+        _mark_uncacheable('title page scan failed')
+
+def _extract_authors(doc, metadata):
+    """
+    Look for author names on the first page when the PDF metadata has no
+    usable author.
+    
+    Args:
+        doc (fitz.Document): Open PDF document
+        metadata (dict): Metadata being extracted, updated in place
+    """
+    try:
+        logger.debug("Searching for author on first page content...")
+        _ocr_log.info("\n📖 Searching for author on first page content...")
+        
+        first_page_text = doc[0].get_text() if len(doc) else ''
+        
+        if first_page_text:
+            lines = [line.strip() for line in first_page_text.split('\n') if line.strip()]
+            
+            # Helper function to check if a line looks like a person's name
+            def is_person_name(line):
+                words = line.split()
+                if not (2 <= len(words) <= 4):
+                    return False
+                if len(line) >= 50:
+                    return False
+                # Each word should start with uppercase and contain only letters
+                for word in words:
+                    if not word or not word[0].isupper():
+                        return False
+                    # Check if word contains only letters (no #, numbers, etc)
+                    if not all(c.isalpha() or c in ['.', ',', '-', "'"] for c in word):
+                        return False
+                # Exclude common non-name words
+                non_name_words = ['programming', 'edition', 'volume', 'series', 'guide', 'introduction', 'advanced', 'complete', 'professional', 'press', 'publishing', 'some', 'view', 'project']
+                if any(word.lower() in non_name_words for word in words):
+                    return False
+                return True
+            
+            # Look for author patterns
+            authors = []
+            i = 0
+            while i < min(30, len(lines)):  # Check first 30 lines
+                line = lines[i]
+                line_lower = line.lower()
+                
+                # Check for "X authors:" pattern
+                if 'author' in line_lower and ':' in line:
+                    _ocr_log.info(f"Found authors indicator: '{line}'")
+                    # Look for names in next few lines (skip non-name lines)
+                    for j in range(i + 1, min(i + 15, len(lines))):
+                        if is_person_name(lines[j]):
+                            authors.append(lines[j])
+                            _ocr_log.info(f"Found author: '{lines[j]}'")
+                            # Keep looking for more consecutive names
+                            k = j + 1
+                            while k < min(j + 5, len(lines)) and is_person_name(lines[k]):
+                                authors.append(lines[k])
+                                _ocr_log.info(f"Found author: '{lines[k]}'")
+                                k += 1
+                            break  # Found author(s), stop searching
+                    if authors:
+                        break
+                # Check if line itself looks like a person name (fallback)
+                elif is_person_name(line):
+                    authors.append(line)
+                    _ocr_log.info(f"Found potential author: '{line}'")
+                    # Check next few lines for more authors
+                    j = i + 1
+                    while j < min(i + 5, len(lines)) and is_person_name(lines[j]):
+                        authors.append(lines[j])
+                        _ocr_log.info(f"Found additional author: '{lines[j]}'")
+                        j += 1
+                    break  # Found author(s), stop searching
+                i += 1
+            
+            if authors:
+                metadata['author'] = ', '.join(authors)
+                logger.debug("Authors from first page: %s", metadata['author'])
+                _ocr_log.info(f"✓ Final authors: {metadata['author']}")
+    except Exception as e:
+        logger.warning("Error extracting authors from first page: %s", e)
+        _mark_uncacheable('author scan failed')
+
+def _count_letters(line):
+    """Count alphabetic characters, with a single translate pass for ASCII lines"""
+    if line.isascii():
+        return len(line.translate(_ASCII_NON_ALPHA))
+    return sum(map(str.isalpha, line))
+
+def _text_block_lines(page):
+    """
+    Return the stripped, non-empty text lines of a page in reading order.
+    
+    Lines are taken from MuPDF's text blocks (sorted top-to-bottom,
+    left-to-right) and image blocks are skipped. The description heuristics
+    work line by line, so blocks are not merged into paragraphs.
+    
+    Args:
+        page (fitz.Page): PDF page
+        
+    Returns:
+        list: Text lines of the page
+    """
+    lines = []
+    for block in page.get_text("blocks", sort=True):
+        if block[6] != 0:  # Image block
+            continue
+        lines.extend(line.strip() for line in block[4].split('\n') if line.strip())
+    return lines
+
+def _extract_description(doc, metadata):
+    """
+    Build a description from the introduction/preface section of an open PDF.
+    
+    Args:
+        doc (fitz.Document): Open PDF document
+        metadata (dict): Metadata being extracted, updated in place
+    """
+    try:
+        # Look for introduction, preface, overview pages
+        intro_page = None
+        intro_page_num = -1
+        found_keyword = ''
+        page_lines = {}
+        
+        # Search first 30 pages for introduction. This stays sequential: PyMuPDF
+        # is not thread-safe (one global MuPDF context, even across separate
+        # Document objects), and the loop usually stops within the first few
+        # pages, so reading ahead in parallel would mostly be wasted work.
+        for page_num in range(min(30, len(doc))):
+            page = doc[page_num]
+            page_lines[page_num] = _text_block_lines(page)
+            page_text = '\n'.join(page_lines[page_num])
+            
+            found = {m.lower() for m in _INTRO_RE.findall(page_text)}
+            if not found:
+                continue
+            keyword = next(kw for kw in _INTRO_KEYWORDS if kw in found)
+            
+            # Check if this is a TOC page (lots of dots)
+            dot_count = page_text.count('.')
+            total_chars = len(page_text)
+            is_toc = (dot_count / total_chars) > 0.1 if total_chars > 0 else False
+            
+            if is_toc:
+                _ocr_log.info(f"⏭ Page {page_num + 1} has '{keyword}' but looks like TOC (skipping)")
+                continue  # Skip TOC pages
+            
+            intro_page = page
+            intro_page_num = page_num
+            found_keyword = keyword
+            logger.debug("Found '%s' on page %d", keyword, page_num + 1)
+            _ocr_log.info(f"✓ Found '{keyword}' on page {page_num + 1} (actual content)")
             break
+        
+        # If no introduction found, use first content page (skip first 3 pages)
+        if not intro_page and len(doc) > 3:
+            intro_page = doc[3]
+            intro_page_num = 3
+            logger.debug("Using page 4 for description (no introduction found)")
+            _ocr_log.info("ℹ Using page 4 for description (no introduction keyword found)")
+        elif not intro_page and len(doc) > 0:
+            intro_page = doc[0]
+            intro_page_num = 0
+        
+        if intro_page:
+            # Collect text from current page AND next 2 pages (for multi-page sections)
+            all_lines = []
+            for offset in range(3):  # Current page + next 2 pages (usually sufficient for introduction sections)
+                page_idx = intro_page_num + offset
+                if page_idx < len(doc):
+                    if page_idx not in page_lines:
+                        page_lines[page_idx] = _text_block_lines(doc[page_idx])
+                    all_lines.extend(page_lines[page_idx])
+                    _ocr_log.info(f"Page {page_idx + 1} has {len(page_lines[page_idx])} lines of text")
+            
+            lines = all_lines
+            
+            # Find the introduction heading, then extract paragraph AFTER it
+            description_lines = []
+            found_heading = False
+            skip_after_heading = 0
+            toc_lines_skipped = 0
+            found_acknowledgments = False
+            skip_acknowledgments = 0
+            
+            _ocr_log.info(f"Processing lines from introduction section (multiple pages):")
+            
+            for i, line in enumerate(lines):
+                # Look for the heading first
+                if not found_heading and found_keyword and _INTRO_KEYWORD_RES[found_keyword].search(line):
+                    found_heading = True
+                    _ocr_log.info(f"Found heading: '{line}'")
+                    
+                    # Only extract title from heading if we don't already have one
+                    # AND it looks like an actual paper title (not section headings)
+                    is_section_heading = _SECTION_HEADING_RE.search(line) is not None
+                    
+                    # Only use heading as title if:
+                    # 1. We don't have a title yet (or it's just placeholder like 'title'/'untitled')
+                    # 2. It's NOT a section heading
+                    # 3. It's reasonably long (>20 chars)
+                    if (not metadata['title'] or metadata['title'].lower() in ['title', 'untitled']) and not is_section_heading and len(line) > 20:
+                        # This looks like an actual paper/article title
+                        metadata['title'] = line.strip()
+                        logger.debug("Extracted title from heading: %s", metadata['title'])
+                        _ocr_log.info(f"✓ Extracted title from heading: {metadata['title']}")
+                    elif metadata['title']:
+                        # Already have a title, don't overwrite
+                        _ocr_log.info(f"Skipping heading as title (already have: '{metadata['title']}')")
+                    continue
+                
+                # Log lines after heading for debugging
+                if found_heading and len(description_lines) < 5:
+                    _ocr_log.info(f"Line {i}: len={len(line)}, text='{line[:80]}'")
+                
+                # Skip lines after heading to get past TOC/navigation content
+                if found_heading and skip_after_heading < 700:  # Manning books have extremely long TOCs + acknowledgments spanning many pages
+                    # Check if line looks like TOC or navigation (dots, page numbers, short entries)
+                    dot_count = len(line) - len(line.translate(_TOC_CHARS))
+                    digit_count = sum(map(str.isdigit, line))
+                    ends_with_number = _TRAILING_NUMBER_RE.search(line)
+                    
+                    # Check for chapter/section numbering at start (e.g., "1.2", "2.1", "Chapter 3")
+                    has_chapter_number = _CHAPTER_NUMBER_RE.match(line)
+                    
+                    # Check for TOC keywords
+                    has_toc_keyword = _TOC_KEYWORD_RE.search(line) is not None
+                    
+                    # Skip if it looks like TOC entry:
+                    # - Has lots of dots/dashes (TOC leaders)
+                    # - Ends with page number
+                    # - Has high digit percentage
+                    # - Is very short (<50 chars)
+                    # - Starts with chapter/section number
+                    # - Contains TOC keywords
+                    is_toc_like = (
+                        dot_count > 3 or 
+                        ends_with_number or 
+                        digit_count > len(line) * 0.15 or
+                        len(line) < 50 or
+                        line.count('■') > 0 or  # Bullet points
+                        has_chapter_number or
+                        has_toc_keyword
+                    )
+                    
+                    if is_toc_like:
+                        skip_after_heading += 1
+                        toc_lines_skipped += 1
+                        if toc_lines_skipped <= 5:  # Log first few lines
+                            _ocr_log.info(f"Skipping TOC/nav line {skip_after_heading}: '{line[:60]}'")
+                        continue
+                    
+                    # Found a proper paragraph line (long, mostly letters, no TOC markers)
+                    letter_count = _count_letters(line)
+                    if len(line) >= 80 and letter_count > len(line) * 0.7:
+                        _ocr_log.info(f"✓ Found description paragraph: '{line[:80]}'")
+                        skip_after_heading = 999  # Done skipping
+                    else:
+                        skip_after_heading += 1
+                        continue
+                
+                # After skipping TOC, check for acknowledgments section before collecting description
+                if skip_after_heading >= 700 and not found_acknowledgments and _ACKNOWLEDGMENT_RE.search(line):
+                    found_acknowledgments = True
+                    skip_acknowledgments = 0
+                    _ocr_log.info(f"Found acknowledgments section (after TOC) at line {i}: '{line}'")
+                    continue
+                
+                # Skip acknowledgments section content (personal narrative)
+                if found_acknowledgments and skip_acknowledgments < 150:
+                    skip_acknowledgments += 1
+                    if skip_acknowledgments <= 5:  # Log first few lines
+                        _ocr_log.info(f"Skipping acknowledgments content line {skip_acknowledgments}: '{line[:60]}'")
+                    continue
+                
+                # If we haven't found heading yet, skip short lines
+                if not found_heading and len(line) < 20:
+                    continue
+                
+                # Skip page numbers and very short lines
+                if line.isdigit() or len(line) < 20:
+                    continue
+                
+                # Skip lines with mostly dots or special chars (TOC entries)
+                dot_count = len(line) - len(line.translate(_TOC_CHARS))
+                if dot_count > len(line) * 0.2:  # More than 20% dots/dashes (stricter)
+                    _ocr_log.info(f"Skipping TOC line: '{line[:50]}'")
+                    continue
+                
+                # Skip lines that are mostly numbers (chapter/page references)
+                digit_count = sum(map(str.isdigit, line))
+                if digit_count > len(line) * 0.3:
+                    _ocr_log.info(f"Skipping number-heavy line: '{line[:50]}'")
+                    continue
+                
+                # Skip lines that look like headers or page references (end with numbers)
+                if _TRAILING_NUMBER_RE.search(line):
+                    continue
+                
+                # Collect paragraph lines (must have mostly letters)
+                letter_count = _count_letters(line)
+                if letter_count < len(line) * 0.5:  # Less than 50% letters
+                    continue
+                
+                description_lines.append(line)
+                current_desc = ' '.join(description_lines)
+                
+                # Collect 200-800 characters to get complete sentences
+                if len(current_desc) >= 200:
+                    # Try to end at a sentence boundary (period followed by space or end)
+                    if len(current_desc) > 800:
+                        # Find last period before 800 chars
+                        truncate_pos = current_desc[:800].rfind('. ')
+                        if truncate_pos > 200:
+                            current_desc = current_desc[:truncate_pos + 1]
+                        else:
+                            # Try just period at end
+                            truncate_pos = current_desc[:800].rfind('.')
+                            if truncate_pos > 200:
+                                current_desc = current_desc[:truncate_pos + 1]
+                    else:
+                        # Check if we already have a complete sentence
+                        if current_desc.endswith('.'):
+                            pass  # Already complete
+                        elif '. ' in current_desc:
+                            # End at last sentence
+                            truncate_pos = current_desc.rfind('. ')
+                            current_desc = current_desc[:truncate_pos + 1]
+                    
+                    metadata['description'] = current_desc.strip()
+                    logger.debug("Extracted description from page %d: %d chars", intro_page_num + 1, len(current_desc))
+                    _ocr_log.info(f"✓ Extracted description: {len(current_desc)} chars")
+                    _ocr_log.info(f"Description text: {current_desc}")
+                    break
+            
+            if toc_lines_skipped > 5:
+                _ocr_log.info(f"Skipped {toc_lines_skipped} TOC/nav lines in total")
+            
+            if not metadata['description'] and description_lines:
+                metadata['description'] = ' '.join(description_lines)[:600]
+                _ocr_log.info(f"✓ Extracted partial description: {len(metadata['description'])} chars")
+            
+            if not metadata['description']:
+                _ocr_log.info("⚠ No suitable description paragraph found")
+    except Exception as e:
+        logger.warning("Error extracting description: %s", e)
+        _ocr_log.error(f"❌ Error extracting description: {e}")
+        _mark_uncacheable('description scan failed')
+
+# Characters of description text considered enough for language detection
+_MIN_LANG_SAMPLE = 200
+
+def _sample_text_for_lang(doc):
+    """
+    Collect roughly 500 characters from the first pages of an open PDF for
+    language detection.
     
-    return metadata
+    Args:
+        doc (fitz.Document): Open PDF document
+        
+    Returns:
+        str: Text sample (empty if the pages could not be read)
+    """
+    parts = []
+    length = 0
+    try:
+        for page_num in range(min(5, len(doc))):
+            page_text = doc[page_num].get_text()
+            parts.append(page_text)
+            length += len(page_text)
+            if length > 500:
+                break
+    except Exception:
+        _mark_uncacheable('language sample unreadable')
+    return ''.join(parts)
 
+# Persistent cache of extracted metadata, keyed by the PDF's SHA-256.
+# Bump the version whenever the extraction logic changes results.
+METADATA_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'pdf_meta.cache')
+_METADATA_CACHE_VERSION = 2
+
+def _metadata_cache_connect():
+    """Open the metadata cache database, creating it if needed"""
+    os.makedirs(os.path.dirname(METADATA_CACHE_PATH), exist_ok=True)
+    conn = sqlite3.connect(METADATA_CACHE_PATH, timeout=5)
+    conn.execute('CREATE TABLE IF NOT EXISTS pdf_meta_cache (key TEXT PRIMARY KEY, value BLOB NOT NULL)')
+    return conn
+
+# Set by cached_by_file_hash while the wrapped function runs; collects the
+# reasons a result is incomplete and must not be cached
+_uncacheable_reasons = contextvars.ContextVar('_uncacheable_reasons', default=None)
+
+def _mark_uncacheable(reason):
+    """
+    Record that the current extraction hit a (possibly transient) failure, so
+    its partial result is returned but not cached. No-op outside the cache.
+    """
+    reasons = _uncacheable_reasons.get()
+    if reasons is not None:
+        reasons.append(reason)
+
+def cached_by_file_hash(f):
+    """
+    Decorator caching a function of a PDF path by the file's SHA-256.
+    
+    Results are pickled into a SQLite key/value table at METADATA_CACHE_PATH,
+    so re-uploading or reprocessing the same file skips the extraction. The
+    key also records whether OCR and CLD3 were available, since they change
+    results. Results the function marked incomplete with _mark_uncacheable()
+    are returned but not stored. Cache errors are logged and the function is
+    run uncached. The uncached function stays available as ``f.__wrapped__``.
+    """
+    @wraps(f)
+    def decorated_function(pdf_path):
+        try:
+            key = (f"v{_METADATA_CACHE_VERSION}:ocr={int(OCR_AVAILABLE)}"
+                   f":cld3={int(LANGUAGE_IDENTIFIER is not None)}:{file_sha256(pdf_path)}")
+            with closing(_metadata_cache_connect()) as conn:
+                row = conn.execute('SELECT value FROM pdf_meta_cache WHERE key = ?', (key,)).fetchone()
+            cached = pickle.loads(row[0]) if row is not None else None
+        except Exception as e:
+            logger.warning("PDF metadata cache unavailable: %s", e)
+            return f(pdf_path)
+        
+        if row is not None:
+            logger.debug("PDF metadata cache hit for %s", pdf_path)
+            return cached
+        
+        reasons = []
+        token = _uncacheable_reasons.set(reasons)
+        try:
+            result = f(pdf_path)
+        finally:
+            _uncacheable_reasons.reset(token)
+        
+        if reasons:
+            logger.info("Not caching PDF metadata for %s: %s", pdf_path, ', '.join(reasons))
+            return result
+        
+        try:
+            with closing(_metadata_cache_connect()) as conn, conn:
+                conn.execute('INSERT OR REPLACE INTO pdf_meta_cache (key, value) VALUES (?, ?)',
+                             (key, pickle.dumps(result)))
+        except Exception as e:
+            logger.warning("Could not store PDF metadata in cache: %s", e)
+        return result
+    return decorated_function
+
+@cached_by_file_hash
 def extract_pdf_metadata(pdf_path):
     """
     Extract metadata from a PDF file including title, author, ISBN, etc.
@@ -362,19 +1041,23 @@ def extract_pdf_metadata(pdf_path):
     def detect_language_from_text(text):
         """Detect language from text sample using AI"""
         try:
-            # Set seed for consistent results
-            DetectorFactory.seed = 0
-            
             # Clean text - remove numbers, special chars, keep only letters and spaces
-            clean_text = re.sub(r'[^a-zA-Z\s]', ' ', text)
-            clean_text = re.sub(r'\s+', ' ', clean_text).strip()
+            clean_text = _NON_LETTER_RE.sub(' ', text)
+            clean_text = _WHITESPACE_RE.sub(' ', clean_text).strip()
             
             # Need at least 50 characters for reliable detection
             if len(clean_text) < 50:
                 return ''
             
-            # Detect language code (e.g., 'en', 'es', 'fr', 'de')
-            lang_code = detect(clean_text)
+            # Detect language code (e.g., 'en', 'es', 'fr', 'de'), preferring CLD3
+            if LANGUAGE_IDENTIFIER is not None:
+                result = LANGUAGE_IDENTIFIER.FindLanguage(text=clean_text)
+                lang_code = result.language if result.is_reliable else ''
+            else:
+                lang_code = detect(clean_text)
+            
+            if not lang_code:
+                return ''
             
             # Map common codes to full language names
             lang_map = {
@@ -385,6 +1068,7 @@ def extract_pdf_metadata(pdf_path):
                 'it': 'Italian',
                 'pt': 'Portuguese',
                 'ru': 'Russian',
+                'zh': 'Chinese',
                 'zh-cn': 'Chinese',
                 'zh-tw': 'Chinese',
                 'ja': 'Japanese',
@@ -402,674 +1086,273 @@ def extract_pdf_metadata(pdf_path):
             
             return lang_map.get(lang_code, lang_code.capitalize())
         except Exception as e:
-            print(f"Language detection error: {e}")
+            logger.warning("Language detection error: %s", e)
+            _mark_uncacheable('language detection failed')
             return ''
     
     if not PYMUPDF_AVAILABLE:
         return metadata
     
+    # Open the document once; every pass below works on this handle
     try:
         doc = fitz.open(pdf_path)
-        
-        # Get PDF metadata
-        pdf_meta = doc.metadata
-        
-        if pdf_meta:
-            metadata['title'] = pdf_meta.get('title', '').strip()
-            metadata['author'] = pdf_meta.get('author', '').strip()
-            metadata['subject'] = pdf_meta.get('subject', '').strip()
-            metadata['keywords'] = pdf_meta.get('keywords', '').strip()
-            metadata['creator'] = pdf_meta.get('creator', '').strip()
-            metadata['producer'] = pdf_meta.get('producer', '').strip()
-            
-            # Use subject as description if available
-            if metadata['subject']:
-                metadata['description'] = metadata['subject']
-            
-            # Parse creation date if available
-            if pdf_meta.get('creationDate'):
-                try:
-                    # PyMuPDF date format: D:YYYYMMDDHHmmSS
-                    date_str = pdf_meta.get('creationDate')
-                    if date_str.startswith('D:'):
-                        date_str = date_str[2:16]  # Get YYYYMMDDHHMMSS
-                        metadata['creation_date'] = datetime.strptime(date_str[:8], '%Y%m%d')
-                except:
-                    pass
-        
-        # Get page count
-        metadata['pages'] = len(doc)
-        
-        # Try to extract ISBN and DOI from multiple locations
-        isbn_pattern = r'ISBN[:\s-]*([0-9]{13}|[0-9]{10}|[0-9\-]{10,17})'
-        doi_pattern = r'DOI[:\s]*([0-9]{2}\.[0-9]{4,}/[^\s]+)'
-        
-        # Check first 15 pages (copyright page can be anywhere in front matter)
-        for page_num in range(min(15, len(doc))):
-            page = doc[page_num]
-            text = page.get_text()
+    except Exception as e:
+        logger.warning("Error opening PDF: %s", e)
+        _mark_uncacheable('PDF could not be opened')
+        _flush_ocr_log()
+        return metadata
+    
+    try:
+        try:
+            # Get PDF metadata
+            pdf_meta = doc.metadata
             
-            # Search for ISBN
-            if not metadata['isbn']:
-                isbn_match = re.search(isbn_pattern, text, re.IGNORECASE)
-                if isbn_match:
-                    isbn = isbn_match.group(1).replace('-', '').replace(' ', '')
-                    if len(isbn) in [10, 13]:  # Valid ISBN length
-                        metadata['isbn'] = isbn
-                        print(f"✓ Found ISBN on page {page_num + 1}: {metadata['isbn']}", flush=True)
+            if pdf_meta:
+                metadata['title'] = pdf_meta.get('title', '').strip()
+                metadata['author'] = pdf_meta.get('author', '').strip()
+                metadata['subject'] = pdf_meta.get('subject', '').strip()
+                metadata['keywords'] = pdf_meta.get('keywords', '').strip()
+                metadata['creator'] = pdf_meta.get('creator', '').strip()
+                metadata['producer'] = pdf_meta.get('producer', '').strip()
+                
+                # Use subject as description if available
+                if metadata['subject']:
+                    metadata['description'] = metadata['subject']
+                
+                # Parse creation date if available
+                if pdf_meta.get('creationDate'):
+                    try:
+                        # PyMuPDF date format: D:YYYYMMDDHHmmSS
+                        date_str = pdf_meta.get('creationDate')
+                        if date_str.startswith('D:'):
+                            date_str = date_str[2:16]  # Get YYYYMMDDHHMMSS
+                            metadata['creation_date'] = datetime.strptime(date_str[:8], '%Y%m%d')
+                    except:
+                        pass
             
-            # Search for DOI
-            if not metadata['doi']:
-                doi_match = re.search(doi_pattern, text, re.IGNORECASE)
-                if doi_match:
-                    metadata['doi'] = doi_match.group(1)
-                    print(f"✓ Found DOI on page {page_num + 1}: {metadata['doi']}", flush=True)
-        
-        # If not found, check last 3 pages (back cover area)
-        if (not metadata['isbn'] or not metadata['doi']) and len(doc) > 0:
-            isbn_pattern = r'ISBN[:\s-]*([0-9]{13}|[0-9]{10}|[0-9\-]{10,17})'
-            doi_pattern = r'DOI[:\s]*([0-9]{2}\.[0-9]{4,}/[^\s]+)'
+            # Get page count
+            metadata['pages'] = len(doc)
             
-            for page_num in range(max(0, len(doc) - 3), len(doc)):
+            # Try to extract ISBN and DOI from multiple locations
+            # Check first 15 pages (copyright page can be anywhere in front matter)
+            for page_num in range(min(15, len(doc))):
+                # Stop before extracting more text once both identifiers are found
+                if metadata['isbn'] and metadata['doi']:
+                    break
                 page = doc[page_num]
                 text = page.get_text()
                 
+                # Search for ISBN
                 if not metadata['isbn']:
-                    isbn_match = re.search(isbn_pattern, text, re.IGNORECASE)
+                    isbn_match = _ISBN_RE.search(text)
                     if isbn_match:
-                        isbn = isbn_match.group(1).replace('-', '').replace(' ', '')
-                        if len(isbn) in [10, 13]:
+                        isbn = isbn_match.group(1).translate(_ISBN_STRIP)
+                        if len(isbn) in [10, 13]:  # Valid ISBN length
                             metadata['isbn'] = isbn
-                            print(f"✓ Found ISBN on page {page_num + 1}: {metadata['isbn']}", flush=True)
+                            logger.debug("Found ISBN on page %d: %s", page_num + 1, metadata['isbn'])
                 
+                # Search for DOI
                 if not metadata['doi']:
-                    doi_match = re.search(doi_pattern, text, re.IGNORECASE)
+                    doi_match = _DOI_RE.search(text)
                     if doi_match:
                         metadata['doi'] = doi_match.group(1)
-                        print(f"✓ Found DOI on page {page_num + 1}: {metadata['doi']}", flush=True)
-        
-        # Extract publication date from first 10 pages (copyright pages)
-        if not metadata['publication_date']:
-            # Try to find full dates first (DD Month YYYY, DD/MM/YYYY, etc.)
-            date_patterns = [
-                # Full date patterns
-                (r'(?:Published|First published|Copyright|©)\s*(?:on\s*)?(\d{1,2})[\/\-\s]+(\w+)[\/\-\s]+([12]\d{3})', 'dmy'),  # DD Month YYYY
-                (r'(?:Published|First published|Copyright|©)\s*(?:on\s*)?(\w+)\s+(\d{1,2})[,\s]+([12]\d{3})', 'mdy'),  # Month DD, YYYY
-                (r'(?:Published|First published|Copyright|©)\s*(?:on\s*)?(\d{1,2})[\/\-](\d{1,2})[\/\-]([12]\d{3})', 'dmy_numeric'),  # DD/MM/YYYY
-                # Year-only patterns (fallback)
-                (r'(?:Published|First published|Copyright|©)\s*(?:in\s*)?([12]\d{3})', 'year_only'),
-                (r'([12]\d{3})\s*(?:by|publication)', 'year_only'),
-                (r'Edition\s*[^0-9]*([12]\d{3})', 'year_only')
-            ]
+                        logger.debug("Found DOI on page %d: %s", page_num + 1, metadata['doi'])
             
-            month_map = {
-                'january': '01', 'february': '02', 'march': '03', 'april': '04',
-                'may': '05', 'june': '06', 'july': '07', 'august': '08',
-                'september': '09', 'october': '10', 'november': '11', 'december': '12',
-                'jan': '01', 'feb': '02', 'mar': '03', 'apr': '04',
-                'jun': '06', 'jul': '07', 'aug': '08', 'sep': '09',
-                'oct': '10', 'nov': '11', 'dec': '12'
-            }
+            # If not found, check last 3 pages (back cover area)
+            if (not metadata['isbn'] or not metadata['doi']) and len(doc) > 0:
+                for page_num in range(max(0, len(doc) - 3), len(doc)):
+                    if metadata['isbn'] and metadata['doi']:
+                        break
+                    page = doc[page_num]
+                    text = page.get_text()
+                    
+                    if not metadata['isbn']:
+                        isbn_match = _ISBN_RE.search(text)
+                        if isbn_match:
+                            isbn = isbn_match.group(1).translate(_ISBN_STRIP)
+                            if len(isbn) in [10, 13]:
+                                metadata['isbn'] = isbn
+                                logger.debug("Found ISBN on page %d: %s", page_num + 1, metadata['isbn'])
+                    
+                    if not metadata['doi']:
+                        doi_match = _DOI_RE.search(text)
+                        if doi_match:
+                            metadata['doi'] = doi_match.group(1)
+                            logger.debug("Found DOI on page %d: %s", page_num + 1, metadata['doi'])
             
-            for page_num in range(min(10, len(doc))):
-                page = doc[page_num]
-                text = page.get_text()
-                
-                for pattern, format_type in date_patterns:
-                    match = re.search(pattern, text, re.IGNORECASE)
-                    if match:
-                        try:
-                            if format_type == 'dmy':
-                                day = match.group(1).zfill(2)
-                                month_str = match.group(2).lower()
-                                year = match.group(3)
-                                month = month_map.get(month_str[:3], '01')
-                                metadata['publication_date'] = f"{day}/{month}/{year}"
-                                print(f"✓ Found publication date on page {page_num + 1}: {metadata['publication_date']}", flush=True)
-                                break
-                            elif format_type == 'mdy':
-                                month_str = match.group(1).lower()
-                                day = match.group(2).zfill(2)
-                                year = match.group(3)
-                                month = month_map.get(month_str[:3], '01')
-                                metadata['publication_date'] = f"{day}/{month}/{year}"
-                                print(f"✓ Found publication date on page {page_num + 1}: {metadata['publication_date']}", flush=True)
-                                break
-                            elif format_type == 'dmy_numeric':
-                                day = match.group(1).zfill(2)
-                                month = match.group(2).zfill(2)
-                                year = match.group(3)
-                                if 1900 <= int(year) <= 2100 and 1 <= int(month) <= 12 and 1 <= int(day) <= 31:
+            # Extract publication date from first 10 pages (copyright pages)
+            if not metadata['publication_date']:
+                for page_num in range(min(10, len(doc))):
+                    page = doc[page_num]
+                    text = page.get_text()
+                    
+                    # Full dates first (DD Month YYYY, DD/MM/YYYY, etc.), then year only
+                    for pattern, format_type in _DATE_PATTERNS:
+                        match = pattern.search(text)
+                        if match:
+                            try:
+                                if format_type == 'dmy':
+                                    day = match.group(1).zfill(2)
+                                    month_str = match.group(2).lower()
+                                    year = match.group(3)
+                                    month = _MONTHS.get(month_str[:3], '01')
                                     metadata['publication_date'] = f"{day}/{month}/{year}"
-                                    print(f"✓ Found publication date on page {page_num + 1}: {metadata['publication_date']}", flush=True)
+                                    logger.debug("Found publication date on page %d: %s", page_num + 1, metadata['publication_date'])
                                     break
-                            elif format_type == 'year_only':
-                                year = match.group(1)
-                                if 1900 <= int(year) <= 2100:
-                                    metadata['publication_date'] = f"01/01/{year}"
-                                    print(f"✓ Found publication year on page {page_num + 1}: {year} (formatted as 01/01/{year})", flush=True)
+                                elif format_type == 'mdy':
+                                    month_str = match.group(1).lower()
+                                    day = match.group(2).zfill(2)
+                                    year = match.group(3)
+                                    month = _MONTHS.get(month_str[:3], '01')
+                                    metadata['publication_date'] = f"{day}/{month}/{year}"
+                                    logger.debug("Found publication date on page %d: %s", page_num + 1, metadata['publication_date'])
                                     break
-                        except:
-                            continue
-                
-                if metadata['publication_date']:
-                    break
-        
-        # If STILL not found and OCR available, try OCR on copyright page (usually page 2-4)
-        if (not metadata['isbn'] or not metadata['doi']) and OCR_AVAILABLE:
-            print("📖 ISBN/DOI not found in text, trying OCR on copyright page...", flush=True)
-            with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                f.write("\n📖 Attempting OCR ISBN/DOI extraction from copyright page...\n")
-            
-            isbn_pattern = r'ISBN[:\s-]*([0-9]{13}|[0-9]{10}|[0-9\-]{10,17})'
-            doi_pattern = r'DOI[:\s]*([0-9]{2}\.[0-9]{4,}/[^\s]+)'
+                                elif format_type == 'dmy_numeric':
+                                    day = match.group(1).zfill(2)
+                                    month = match.group(2).zfill(2)
+                                    year = match.group(3)
+                                    if 1900 <= int(year) <= 2100 and 1 <= int(month) <= 12 and 1 <= int(day) <= 31:
+                                        metadata['publication_date'] = f"{day}/{month}/{year}"
+                                        logger.debug("Found publication date on page %d: %s", page_num + 1, metadata['publication_date'])
+                                        break
+                                elif format_type == 'year_only':
+                                    year = match.group(1)
+                                    if 1900 <= int(year) <= 2100:
+                                        metadata['publication_date'] = f"01/01/{year}"
+                                        logger.debug("Found publication year on page %d: %s (formatted as 01/01/%s)", page_num + 1, year, year)
+                                        break
+                            except:
+                                continue
+                    
+                    if metadata['publication_date']:
+                        break
             
-            for page_num in range(1, min(5, len(doc))):  # Check pages 2-5
+            # If STILL not found and OCR available, try OCR on copyright page (usually page 2-4)
+            if (not metadata['isbn'] or not metadata['doi']) and OCR_AVAILABLE:
+                logger.debug("ISBN/DOI not found in text, trying OCR on copyright page...")
+                _ocr_log.info("\n📖 Attempting OCR ISBN/DOI extraction from copyright page...")
+                
+                # OCR pages 2-5 in a single tesseract run
+                page_numbers = list(range(1, min(5, len(doc))))
                 try:
-                    page = doc[page_num]
-                    pix = page.get_pixmap(matrix=fitz.Matrix(2.0, 2.0))
-                    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                    ocr_text = pytesseract.image_to_string(img)
-                    
+                    ocr_texts = ocr_pages(doc, page_numbers)
+                except Exception as e:
+                    ocr_texts = []
+                    _ocr_log.error(f"Copyright page OCR failed: {e}")
+                    _mark_uncacheable('copyright page OCR failed')
+                
+                for page_num, ocr_text in zip(page_numbers, ocr_texts):
                     if not metadata['isbn']:
-                        isbn_match = re.search(isbn_pattern, ocr_text, re.IGNORECASE)
+                        isbn_match = _ISBN_RE.search(ocr_text)
                         if isbn_match:
-                            isbn = isbn_match.group(1).replace('-', '').replace(' ', '')
+                            isbn = isbn_match.group(1).translate(_ISBN_STRIP)
                             if len(isbn) in [10, 13]:
                                 metadata['isbn'] = isbn
-                                print(f"✓ Found ISBN via OCR on page {page_num + 1}: {metadata['isbn']}", flush=True)
-                                with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                                    f.write(f"✓ Found ISBN via OCR on page {page_num + 1}: {metadata['isbn']}\n")
+                                logger.debug("Found ISBN via OCR on page %d: %s", page_num + 1, metadata['isbn'])
+                                _ocr_log.info(f"✓ Found ISBN via OCR on page {page_num + 1}: {metadata['isbn']}")
                     
                     if not metadata['doi']:
-                        doi_match = re.search(doi_pattern, ocr_text, re.IGNORECASE)
+                        doi_match = _DOI_RE.search(ocr_text)
                         if doi_match:
                             metadata['doi'] = doi_match.group(1)
-                            print(f"✓ Found DOI via OCR on page {page_num + 1}: {metadata['doi']}", flush=True)
-                            with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                                f.write(f"✓ Found DOI via OCR on page {page_num + 1}: {metadata['doi']}\n")
+                            logger.debug("Found DOI via OCR on page %d: %s", page_num + 1, metadata['doi'])
+                            _ocr_log.info(f"✓ Found DOI via OCR on page {page_num + 1}: {metadata['doi']}")
                     
                     if metadata['isbn'] and metadata['doi']:
                         break
-                except Exception as e:
-                    continue
+            
+        except Exception as e:
+            logger.warning("Error extracting PDF metadata: %s", e)
+            _mark_uncacheable('metadata pass failed')
         
-        doc.close()
+        # If metadata is incomplete, try OCR from cover
+        # Write debug to file since Flask swallows print statements
+        _ocr_log.info(f"\n=== OCR Debug ===")
+        _ocr_log.info(f"OCR_AVAILABLE={OCR_AVAILABLE}, title='{metadata['title']}', author='{metadata['author']}', isbn='{metadata['isbn']}', doi='{metadata['doi']}'")
         
-    except Exception as e:
-        print(f"Error extracting PDF metadata: {e}", flush=True)
-    
-    # If metadata is incomplete, try OCR from cover
-    # Write debug to file since Flask swallows print statements
-    with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-        f.write(f"\n=== OCR Debug ===\n")
-        f.write(f"OCR_AVAILABLE={OCR_AVAILABLE}, title='{metadata['title']}', author='{metadata['author']}', isbn='{metadata['isbn']}', doi='{metadata['doi']}'\n")
-    
-    if OCR_AVAILABLE and (not metadata['title'] or not metadata['author']):
-        try:
-            with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                f.write("📖 PDF metadata incomplete, attempting OCR extraction from cover...\n")
-            
-            cover_text = extract_text_from_cover(pdf_path)
-            
-            with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                f.write(f"OCR extracted {len(cover_text)} characters\n")
-                f.write(f"RAW OCR TEXT:\n{cover_text}\n")
-            
-            if cover_text:
-                cover_metadata = parse_cover_text(cover_text)
-                with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                    f.write(f"Parsed metadata - Title: '{cover_metadata['title']}', Author: '{cover_metadata['author']}', Publisher: '{cover_metadata.get('publisher', '')}', ISBN: '{cover_metadata['isbn']}'\n")
+        if OCR_AVAILABLE and (not metadata['title'] or not metadata['author']):
+            try:
+                _ocr_log.info("📖 PDF metadata incomplete, attempting OCR extraction from cover...")
                 
-                # Fill in missing fields from OCR (but NOT description - that comes from introduction)
-                if not metadata['title'] and cover_metadata['title']:
-                    metadata['title'] = cover_metadata['title']
-                    print(f"✓ OCR Title: {metadata['title']}", flush=True)
-                if not metadata['author'] and cover_metadata['author']:
-                    metadata['author'] = cover_metadata['author']
-                    print(f"✓ OCR Author: {metadata['author']}", flush=True)
-                if not metadata['publisher'] and cover_metadata.get('publisher'):
-                    metadata['publisher'] = cover_metadata['publisher']
-                    print(f"✓ OCR Publisher: {metadata['publisher']}", flush=True)
-                if not metadata['isbn'] and cover_metadata['isbn']:
-                    metadata['isbn'] = cover_metadata['isbn']
-                    print(f"✓ OCR ISBN: {metadata['isbn']}", flush=True)
-        except Exception as e:
-            import traceback
-            print(f"❌ Error during OCR extraction: {e}", flush=True)
-            traceback.print_exc()
-    elif not OCR_AVAILABLE:
-        print("⚠ OCR not available (Tesseract not configured)")
-    
-    # If title is still empty or rejected (publisher name), try to extract from page 2 (title page)
-    if (not metadata['title'] or len(metadata['title']) < 5) and PYMUPDF_AVAILABLE:
-        try:
-            print("📖 Searching for title on page 2 (title page)...", flush=True)
-            with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                f.write("\n📖 Searching for title on page 2 (title page)...\n")
-            
-            doc = fitz.open(pdf_path)
-            if len(doc) > 1:  # Check if page 2 exists
-                page_text = doc[1].get_text()  # Page 2 is index 1
-                lines = [line.strip() for line in page_text.split('\n') if line.strip()]
+                cover_text = extract_text_from_cover(pdf_path, doc=doc)
                 
-                with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                    f.write(f"Page 2 has {len(lines)} lines of text\n")
+                _ocr_log.info(f"OCR extracted {len(cover_text)} characters")
+                _ocr_log.info(f"RAW OCR TEXT:\n{cover_text}")
                 
-                # Look for title in first 10 lines of page 2
-                publisher_keywords = ['manning', 'press', 'publishing', 'publisher', 'ebook', 'provided']
-                for i, line in enumerate(lines[:10]):
-                    # Skip very short lines (likely page numbers)
-                    if len(line) < 10:
-                        continue
+                if cover_text:
+                    cover_metadata = parse_cover_text(cover_text)
+                    _ocr_log.info(f"Parsed metadata - Title: '{cover_metadata['title']}', Author: '{cover_metadata['author']}', Publisher: '{cover_metadata.get('publisher', '')}', ISBN: '{cover_metadata['isbn']}'")
                     
-                    # Skip lines with mostly lowercase (likely descriptions)
-                    if sum(c.islower() for c in line) > len(line) * 0.7:
-                        continue
-                    
-                    # Skip publisher names
-                    if any(kw in line.lower() for kw in publisher_keywords):
-                        with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                            f.write(f"Skipping publisher line: '{line}'\n")
-                        continue
-                    
-                    # Good candidate if it's Title Case or ALL CAPS, reasonable length
-                    if 10 <= len(line) <= 150:
-                        # Check if it looks like a title (not URL, email, etc.)
-                        if not any(x in line for x in ['http://', 'https://', '@', 'www.']):
-                            metadata['title'] = line
-                            print(f"✓ Title from page 2: {metadata['title']}", flush=True)
-                            with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                                f.write(f"✓ Extracted title from page 2: {metadata['title']}\n")
-                            break
-            
-            doc.close()
-        except Exception as e:
-            print(f"Error extracting title from page 2: {e}", flush=True)
-            with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                f.write(f"Error extracting title from page 2: {e}\n")
-    
-    # If author is still empty or looks invalid (single word, numbers, etc.), try to extract from first page content
-    def is_valid_author(author):
-        """Check if author name looks valid"""
-        if not author:
-            return False
-        # Invalid if contains numbers or special chars
-        if any(c.isdigit() for c in author):
-            return False
-        # Invalid if only one word (should be first + last name)
-        words = author.replace(',', ' ').split()
-        if len(words) < 2:
-            return False
-        return True
-    
-    if (not metadata['author'] or not is_valid_author(metadata['author'])) and PYMUPDF_AVAILABLE:
-        try:
-            print("📖 Searching for author on first page content...", flush=True)
-            with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                f.write("\n📖 Searching for author on first page content...\n")
-            
-            doc = fitz.open(pdf_path)
-            if len(doc) > 0:
-                page_text = doc[0].get_text()
-                lines = [line.strip() for line in page_text.split('\n') if line.strip()]
-                
-                # Helper function to check if a line looks like a person's name
-                def is_person_name(line):
-                    words = line.split()
-                    if not (2 <= len(words) <= 4):
-                        return False
-                    if len(line) >= 50:
-                        return False
-                    # Each word should start with uppercase and contain only letters
-                    for word in words:
-                        if not word or not word[0].isupper():
-                            return False
-                        # Check if word contains only letters (no #, numbers, etc)
-                        if not all(c.isalpha() or c in ['.', ',', '-', "'"] for c in word):
-                            return False
-                    # Exclude common non-name words
-                    non_name_words = ['programming', 'edition', 'volume', 'series', 'guide', 'introduction', 'advanced', 'complete', 'professional', 'press', 'publishing', 'some', 'view', 'project']
-                    if any(word.lower() in non_name_words for word in words):
-                        return False
-                    return True
-                
-                # Look for author patterns
-                authors = []
-                i = 0
-                while i < min(30, len(lines)):  # Check first 30 lines
-                    line = lines[i]
-                    line_lower = line.lower()
-                    
-                    # Check for "X authors:" pattern
-                    if 'author' in line_lower and ':' in line:
-                        with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                            f.write(f"Found authors indicator: '{line}'\n")
-                        # Look for names in next few lines (skip non-name lines)
-                        for j in range(i + 1, min(i + 15, len(lines))):
-                            if is_person_name(lines[j]):
-                                authors.append(lines[j])
-                                with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                                    f.write(f"Found author: '{lines[j]}'\n")
-                                # Keep looking for more consecutive names
-                                k = j + 1
-                                while k < min(j + 5, len(lines)) and is_person_name(lines[k]):
-                                    authors.append(lines[k])
-                                    with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                                        f.write(f"Found author: '{lines[k]}'\n")
-                                    k += 1
-                                break  # Found author(s), stop searching
-                        if authors:
-                            break
-                    # Check if line itself looks like a person name (fallback)
-                    elif is_person_name(line):
-                        authors.append(line)
-                        with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                            f.write(f"Found potential author: '{line}'\n")
-                        # Check next few lines for more authors
-                        j = i + 1
-                        while j < min(i + 5, len(lines)) and is_person_name(lines[j]):
-                            authors.append(lines[j])
-                            with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                                f.write(f"Found additional author: '{lines[j]}'\n")
-                            j += 1
-                        break  # Found author(s), stop searching
-                    i += 1
-                
-                if authors:
-                    metadata['author'] = ', '.join(authors)
-                    print(f"✓ Authors from first page: {metadata['author']}", flush=True)
-                    with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                        f.write(f"✓ Final authors: {metadata['author']}\n")
-            
-            doc.close()
-        except Exception as e:
-            print(f"Error extracting authors from first page: {e}", flush=True)
-    
-    # If description is still empty, extract from introduction/preface page
-    if not metadata['description']:
-        print("📖 Description still empty, searching for introduction page...", flush=True)
-        with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-            f.write("\n📖 Searching for introduction/preface page for description...\n")
+                    # Fill in missing fields from OCR (but NOT description - that comes from introduction)
+                    if not metadata['title'] and cover_metadata['title']:
+                        metadata['title'] = cover_metadata['title']
+                        logger.debug("OCR Title: %s", metadata['title'])
+                    if not metadata['author'] and cover_metadata['author']:
+                        metadata['author'] = cover_metadata['author']
+                        logger.debug("OCR Author: %s", metadata['author'])
+                    if not metadata['publisher'] and cover_metadata.get('publisher'):
+                        metadata['publisher'] = cover_metadata['publisher']
+                        logger.debug("OCR Publisher: %s", metadata['publisher'])
+                    if not metadata['isbn'] and cover_metadata['isbn']:
+                        metadata['isbn'] = cover_metadata['isbn']
+                        logger.debug("OCR ISBN: %s", metadata['isbn'])
+            except Exception as e:
+                logger.exception("Error during OCR extraction: %s", e)
+                _mark_uncacheable('cover OCR failed')
+        elif not OCR_AVAILABLE:
+            logger.debug("OCR not available (Tesseract not configured)")
         
-        try:
-            doc = fitz.open(pdf_path)
-            
-            # Look for introduction, preface, overview pages
-            intro_keywords = ['introduction', 'preface', 'overview', 'summary', 'abstract', 'foreword', 'about this book']
-            intro_page = None
-            intro_page_num = -1
-            found_keyword = ''
-            
-            # Search first 30 pages for introduction
-            for page_num in range(min(30, len(doc))):
-                page = doc[page_num]
-                page_text = page.get_text()
-                page_text_lower = page_text.lower()
-                
-                for keyword in intro_keywords:
-                    if keyword in page_text_lower:
-                        # Check if this is a TOC page (lots of dots)
-                        dot_count = page_text.count('.')
-                        total_chars = len(page_text)
-                        is_toc = (dot_count / total_chars) > 0.1 if total_chars > 0 else False
-                        
-                        if is_toc:
-                            with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                                f.write(f"⏭ Page {page_num + 1} has '{keyword}' but looks like TOC (skipping)\n")
-                            continue  # Skip TOC pages
-                        
-                        intro_page = page
-                        intro_page_num = page_num
-                        found_keyword = keyword
-                        print(f"📖 Found '{keyword}' on page {page_num + 1}", flush=True)
-                        with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                            f.write(f"✓ Found '{keyword}' on page {page_num + 1} (actual content)\n")
-                        break
-                
-                if intro_page:
-                    break
+        # If title is still empty or rejected (publisher name), try to extract from page 2 (title page)
+        if (not metadata['title'] or len(metadata['title']) < 5):
+            _extract_title_from_title_page(doc, metadata)
+        
+        # If author is still empty or looks invalid (single word, numbers, etc.), try to extract from first page content
+        def is_valid_author(author):
+            """Check if author name looks valid"""
+            if not author:
+                return False
+            # Invalid if contains numbers or special chars
+            if any(c.isdigit() for c in author):
+                return False
+            # Invalid if only one word (should be first + last name)
+            words = author.replace(',', ' ').split()
+            if len(words) < 2:
+                return False
+            return True
+        
+        if (not metadata['author'] or not is_valid_author(metadata['author'])):
+            _extract_authors(doc, metadata)
+        
+        # If description is still empty, extract from introduction/preface page
+        if not metadata['description']:
+            logger.debug("Description still empty, searching for introduction page...")
+            _ocr_log.info("\n📖 Searching for introduction/preface page for description...")
             
-            # If no introduction found, use first content page (skip first 3 pages)
-            if not intro_page and len(doc) > 3:
-                intro_page = doc[3]
-                intro_page_num = 3
-                print(f"📖 Using page 4 for description (no introduction found)", flush=True)
-                with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                    f.write("ℹ Using page 4 for description (no introduction keyword found)\n")
-            elif not intro_page and len(doc) > 0:
-                intro_page = doc[0]
-                intro_page_num = 0
+            _extract_description(doc, metadata)
+        
+        # Detect language from available text
+        if not metadata['language']:
+            logger.debug("Detecting book language...")
+            # Try to get text sample for language detection
+            text_for_detection = ''
             
-            if intro_page:
-                # Collect text from current page AND next 2 pages (for multi-page sections)
-                all_lines = []
-                for offset in range(3):  # Current page + next 2 pages (usually sufficient for introduction sections)
-                    page_idx = intro_page_num + offset
-                    if page_idx < len(doc):
-                        page = doc[page_idx]
-                        page_text = page.get_text()
-                        page_lines = [line.strip() for line in page_text.split('\n') if line.strip()]
-                        all_lines.extend(page_lines)
-                        with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                            f.write(f"Page {page_idx + 1} has {len(page_lines)} lines of text\n")
-                
-                lines = all_lines
-                
-                # Find the introduction heading, then extract paragraph AFTER it
-                description_lines = []
-                found_heading = False
-                skip_after_heading = 0
-                found_acknowledgments = False
-                skip_acknowledgments = 0
-                
-                with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                    f.write(f"Processing lines from introduction section (multiple pages):\n")
-                
-                for i, line in enumerate(lines):
-                    # Look for the heading first
-                    if not found_heading and found_keyword and found_keyword in line.lower():
-                        found_heading = True
-                        with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                            f.write(f"Found heading: '{line}'\n")
-                        
-                        # Only extract title from heading if we don't already have one
-                        # AND it looks like an actual paper title (not section headings)
-                        section_keywords = ['about this book', 'about the', 'preface', 'foreword', 'contents', 'table of', 'summary', 'abstract']
-                        is_section_heading = any(kw in line.lower() for kw in section_keywords)
-                        
-                        # Only use heading as title if:
-                        # 1. We don't have a title yet (or it's just placeholder like 'title'/'untitled')
-                        # 2. It's NOT a section heading
-                        # 3. It's reasonably long (>20 chars)
-                        if (not metadata['title'] or metadata['title'].lower() in ['title', 'untitled']) and not is_section_heading and len(line) > 20:
-                            # This looks like an actual paper/article title
-                            metadata['title'] = line.strip()
-                            print(f"✓ Extracted title from heading: {metadata['title']}", flush=True)
-                            with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                                f.write(f"✓ Extracted title from heading: {metadata['title']}\n")
-                        elif metadata['title']:
-                            # Already have a title, don't overwrite
-                            with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                                f.write(f"Skipping heading as title (already have: '{metadata['title']}')\n")
-                        continue
-                    
-                    # Log lines after heading for debugging
-                    if found_heading and len(description_lines) < 5:
-                        with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                            f.write(f"Line {i}: len={len(line)}, text='{line[:80]}'\n")
-                    
-                    # Skip lines after heading to get past TOC/navigation content
-                    if found_heading and skip_after_heading < 700:  # Manning books have extremely long TOCs + acknowledgments spanning many pages
-                        # Check if line looks like TOC or navigation (dots, page numbers, short entries)
-                        dot_count = line.count('.') + line.count('_') + line.count('-')
-                        digit_count = sum(c.isdigit() for c in line)
-                        ends_with_number = re.search(r'\d+\s*$', line)
-                        
-                        # Check for chapter/section numbering at start (e.g., "1.2", "2.1", "Chapter 3")
-                        has_chapter_number = re.match(r'^\s*(\d+\.?\d*\s+|Chapter\s+\d+|CHAPTER\s+\d+)', line)
-                        
-                        # Check for TOC keywords
-                        toc_keywords = ['contents', 'acknowledgment', 'foreword', 'preface', 'introduction', 
-                                       'appendix', 'glossary', 'index', 'part 1', 'part 2', 'part 3', 
-                                       'about this book', 'about the book']
-                        has_toc_keyword = any(kw in line.lower() for kw in toc_keywords)
-                        
-                        # Skip if it looks like TOC entry:
-                        # - Has lots of dots/dashes (TOC leaders)
-                        # - Ends with page number
-                        # - Has high digit percentage
-                        # - Is very short (<50 chars)
-                        # - Starts with chapter/section number
-                        # - Contains TOC keywords
-                        is_toc_like = (
-                            dot_count > 3 or 
-                            ends_with_number or 
-                            digit_count > len(line) * 0.15 or
-                            len(line) < 50 or
-                            line.count('■') > 0 or  # Bullet points
-                            has_chapter_number or
-                            has_toc_keyword
-                        )
-                        
-                        if is_toc_like:
-                            skip_after_heading += 1
-                            with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                                f.write(f"Skipping TOC/nav line {skip_after_heading}: '{line[:60]}'\n")
-                            continue
-                        
-                        # Found a proper paragraph line (long, mostly letters, no TOC markers)
-                        letter_count = sum(c.isalpha() for c in line)
-                        if len(line) >= 80 and letter_count > len(line) * 0.7:
-                            with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                                f.write(f"✓ Found description paragraph: '{line[:80]}'\n")
-                            skip_after_heading = 999  # Done skipping
-                        else:
-                            skip_after_heading += 1
-                            continue
-                    
-                    # After skipping TOC, check for acknowledgments section before collecting description
-                    if skip_after_heading >= 700 and not found_acknowledgments and 'acknowledgment' in line.lower():
-                        found_acknowledgments = True
-                        skip_acknowledgments = 0
-                        with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                            f.write(f"Found acknowledgments section (after TOC) at line {i}: '{line}'\n")
-                        continue
-                    
-                    # Skip acknowledgments section content (personal narrative)
-                    if found_acknowledgments and skip_acknowledgments < 150:
-                        skip_acknowledgments += 1
-                        if skip_acknowledgments <= 5:  # Log first few lines
-                            with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                                f.write(f"Skipping acknowledgments content line {skip_acknowledgments}: '{line[:60]}'\n")
-                        continue
-                    
-                    # If we haven't found heading yet, skip short lines
-                    if not found_heading and len(line) < 20:
-                        continue
-                    
-                    # Skip page numbers and very short lines
-                    if line.isdigit() or len(line) < 20:
-                        continue
-                    
-                    # Skip lines with mostly dots or special chars (TOC entries)
-                    dot_count = line.count('.') + line.count('_') + line.count('-')
-                    if dot_count > len(line) * 0.2:  # More than 20% dots/dashes (stricter)
-                        with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                            f.write(f"Skipping TOC line: '{line[:50]}'\n")
-                        continue
-                    
-                    # Skip lines that are mostly numbers (chapter/page references)
-                    digit_count = sum(c.isdigit() for c in line)
-                    if digit_count > len(line) * 0.3:
-                        with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                            f.write(f"Skipping number-heavy line: '{line[:50]}'\n")
-                        continue
-                    
-                    # Skip lines that look like headers or page references (end with numbers)
-                    if re.search(r'\d+\s*$', line):
-                        continue
-                    
-                    # Collect paragraph lines (must have mostly letters)
-                    letter_count = sum(c.isalpha() for c in line)
-                    if letter_count < len(line) * 0.5:  # Less than 50% letters
-                        continue
-                    
-                    description_lines.append(line)
-                    current_desc = ' '.join(description_lines)
-                    
-                    # Collect 200-800 characters to get complete sentences
-                    if len(current_desc) >= 200:
-                        # Try to end at a sentence boundary (period followed by space or end)
-                        if len(current_desc) > 800:
-                            # Find last period before 800 chars
-                            truncate_pos = current_desc[:800].rfind('. ')
-                            if truncate_pos > 200:
-                                current_desc = current_desc[:truncate_pos + 1]
-                            else:
-                                # Try just period at end
-                                truncate_pos = current_desc[:800].rfind('.')
-                                if truncate_pos > 200:
-                                    current_desc = current_desc[:truncate_pos + 1]
-                        else:
-                            # Check if we already have a complete sentence
-                            if current_desc.endswith('.'):
-                                pass  # Already complete
-                            elif '. ' in current_desc:
-                                # End at last sentence
-                                truncate_pos = current_desc.rfind('. ')
-                                current_desc = current_desc[:truncate_pos + 1]
-                        
-                        metadata['description'] = current_desc.strip()
-                        print(f"✓ Extracted description from page {intro_page_num + 1}: {len(current_desc)} chars", flush=True)
-                        with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                            f.write(f"✓ Extracted description: {len(current_desc)} chars\n")
-                            f.write(f"Description text: {current_desc}\n")
-                        break
-                
-                if not metadata['description'] and description_lines:
-                    metadata['description'] = ' '.join(description_lines)[:600]
-                    with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                        f.write(f"✓ Extracted partial description: {len(metadata['description'])} chars\n")
-                
-                if not metadata['description']:
-                    with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                        f.write("⚠ No suitable description paragraph found\n")
+            # Prefer description if it is long enough for a reliable guess (already cleaned)
+            if len(metadata['description']) >= _MIN_LANG_SAMPLE:
+                text_for_detection = metadata['description']
+            else:
+                # Otherwise use first few pages
+                text_for_detection = _sample_text_for_lang(doc)
             
-            doc.close()
-        except Exception as e:
-            print(f"Error extracting description: {e}", flush=True)
-            with open('debug_ocr.log', 'a', encoding='utf-8') as f:
-                f.write(f"❌ Error extracting description: {e}\n")
-    
-    # Detect language from available text
-    if not metadata['language']:
-        print("🌍 Detecting book language...")
-        # Try to get text sample for language detection
-        text_for_detection = ''
-        
-        # Prefer description if available (already cleaned)
-        if metadata['description']:
-            text_for_detection = metadata['description']
-        else:
-            # Otherwise use first few pages
-            try:
-                doc = fitz.open(pdf_path)
-                for page_num in range(min(5, len(doc))):
-                    page = doc[page_num]
-                    text_for_detection += page.get_text()
-                    if len(text_for_detection) > 500:
-                        break
-                doc.close()
-            except:
-                pass
+            if text_for_detection:
+                detected_lang = detect_language_from_text(text_for_detection)
+                if detected_lang:
+                    metadata['language'] = detected_lang
+                    logger.debug("Detected language: %s", detected_lang)
+                else:
+                    logger.debug("Could not detect language")
         
-        if text_for_detection:
-            detected_lang = detect_language_from_text(text_for_detection)
-            if detected_lang:
-                metadata['language'] = detected_lang
-                print(f"✓ Detected language: {detected_lang}")
-            else:
-                print("⚠ Could not detect language")
+    finally:
+        doc.close()
+        _flush_ocr_log()
     
     return metadata
@@ -6,23 +6,64 @@ and convert it to a thumbnail image.
 """
 
 import os
-from PIL import Image
-try:
-    from pdf2image import convert_from_path
-    PDF2IMAGE_AVAILABLE = True
-except ImportError:
-    PDF2IMAGE_AVAILABLE = False
-    
-try:
-    import fitz  # PyMuPDF
-    PYMUPDF_AVAILABLE = True
-except ImportError:
-    PYMUPDF_AVAILABLE = False
+import hashlib
+import shutil
+from functools import lru_cache
+
+# Quality used when a thumbnail is written as JPEG (.jpg/.jpeg output path)
+JPEG_QUALITY = 85
+
+# Rendered thumbnails, keyed by PDF hash and size. Kept under instance/ (not
+# the publicly served uploads folder) and trimmed to the most recently used
+# THUMBNAIL_CACHE_MAX_ENTRIES files.
+THUMBNAIL_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'thumbs')
+THUMBNAIL_CACHE_MAX_ENTRIES = 200
+
+# The PDF libraries are imported on first use rather than at module import,
+# so workers that never render a thumbnail don't load them.
+
+@lru_cache(maxsize=1)
+def _has_pymupdf():
+    """Check once whether PyMuPDF (fitz) can be imported"""
+    try:
+        import fitz  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+@lru_cache(maxsize=1)
+def _has_pdf2image():
+    """Check once whether pdf2image (and Pillow) can be imported"""
+    try:
+        import pdf2image  # noqa: F401
+        from PIL import Image  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def file_sha256(path):
+    """
+    Return the hex SHA-256 digest of a file's contents
+    
+    Args:
+        path: Path to the file
+    
+    Returns:
+        str: Hex digest
+    """
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
 
 def generate_pdf_thumbnail(pdf_path, output_path, max_width=300, max_height=450):
     """
     Generate a thumbnail image from the first page of a PDF.
     
+    Thumbnails are cached in THUMBNAIL_CACHE_DIR, named by the PDF's SHA-256
+    and the requested size, so regenerating the cover of an unchanged PDF (or
+    of another book with the same PDF) only copies the cached image into
+    place. Each output is its own copy, so later changes to one cover never
+    affect another.
+    
     Args:
         pdf_path: Path to the PDF file
         output_path: Path where the thumbnail should be saved
@@ -32,9 +73,49 @@ def generate_pdf_thumbnail(pdf_path, output_path, max_width=300, max_height=450)
     Returns:
         bool: True if successful, False otherwise
     """
+    try:
+        pdf_hash = file_sha256(pdf_path)
+    except OSError as e:
+        print(f"Could not read PDF for thumbnail: {e}")
+        return False
+    
+    ext = os.path.splitext(output_path)[1].lower() or '.png'
+    cached_path = os.path.join(THUMBNAIL_CACHE_DIR, f"{pdf_hash}_{max_width}x{max_height}{ext}")
+    
+    if os.path.exists(cached_path):
+        os.utime(cached_path)  # Mark as recently used
+    else:
+        os.makedirs(THUMBNAIL_CACHE_DIR, exist_ok=True)
+        # Render under a temporary name so a failed render never leaves a partial cache entry
+        partial_path = os.path.join(THUMBNAIL_CACHE_DIR, f"{pdf_hash}_{max_width}x{max_height}.partial{ext}")
+        if not _render_thumbnail(pdf_path, partial_path, max_width, max_height):
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            return False
+        os.replace(partial_path, cached_path)
+        _prune_thumbnail_cache()
+    
+    shutil.copyfile(cached_path, output_path)
+    return True
+
+def _prune_thumbnail_cache():
+    """Delete the least recently used cached thumbnails beyond the size limit"""
+    try:
+        entries = [entry for entry in os.scandir(THUMBNAIL_CACHE_DIR)
+                   if entry.is_file() and '.partial' not in entry.name]
+        if len(entries) <= THUMBNAIL_CACHE_MAX_ENTRIES:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - THUMBNAIL_CACHE_MAX_ENTRIES]:
+            os.remove(entry.path)
+    except OSError as e:
+        print(f"Could not prune thumbnail cache: {e}")
+
+def _render_thumbnail(pdf_path, output_path, max_width, max_height):
+    """Render the first page with whichever PDF library is available"""
     
     # Try PyMuPDF first (faster and more reliable)
-    if PYMUPDF_AVAILABLE:
+    if _has_pymupdf():
         try:
             return _generate_thumbnail_pymupdf(pdf_path, output_path, max_width, max_height)
         except Exception as e:
@@ -42,7 +123,7 @@ def generate_pdf_thumbnail(pdf_path, output_path, max_width=300, max_height=450)
             # Fall through to try pdf2image
     
     # Try pdf2image as fallback
-    if PDF2IMAGE_AVAILABLE:
+    if _has_pdf2image():
         try:
             return _generate_thumbnail_pdf2image(pdf_path, output_path, max_width, max_height)
         except Exception as e:
@@ -52,8 +133,14 @@ def generate_pdf_thumbnail(pdf_path, output_path, max_width=300, max_height=450)
     print("No PDF processing library available. Install PyMuPDF (fitz) or pdf2image.")
     return False
 
+def _is_jpeg_path(path):
+    """Check whether a thumbnail path asks for a JPEG image"""
+    return os.path.splitext(path)[1].lower() in ('.jpg', '.jpeg')
+
 def _generate_thumbnail_pymupdf(pdf_path, output_path, max_width, max_height):
     """Generate thumbnail using PyMuPDF (fitz)"""
+    import fitz
+    
     doc = fitz.open(pdf_path)
     
     if len(doc) == 0:
@@ -68,18 +155,24 @@ def _generate_thumbnail_pymupdf(pdf_path, output_path, max_width, max_height):
     zoom_y = max_height / rect.height
     zoom = min(zoom_x, zoom_y)
     
-    # Render page to pixmap
+    # Render page to an opaque RGB pixmap (covers need no alpha channel)
     mat = fitz.Matrix(zoom, zoom)
-    pix = page.get_pixmap(matrix=mat)
+    pix = page.get_pixmap(matrix=mat, alpha=False, colorspace=fitz.csRGB)
     
-    # Save as PNG
-    pix.save(output_path)
+    # Save as JPEG or PNG, depending on the output extension
+    if _is_jpeg_path(output_path):
+        pix.save(output_path, jpg_quality=JPEG_QUALITY)
+    else:
+        pix.save(output_path)
     doc.close()
     
     return True
 
 def _generate_thumbnail_pdf2image(pdf_path, output_path, max_width, max_height):
     """Generate thumbnail using pdf2image"""
+    from pdf2image import convert_from_path
+    from PIL import Image
+    
     # Convert first page only
     images = convert_from_path(pdf_path, first_page=1, last_page=1, dpi=150)
     
@@ -92,7 +185,10 @@ def _generate_thumbnail_pdf2image(pdf_path, output_path, max_width, max_height):
     # Resize to fit within max dimensions
     img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
     
-    # Save as PNG
-    img.save(output_path, 'PNG', optimize=True)
+    # Save as JPEG or PNG, depending on the output extension
+    if _is_jpeg_path(output_path):
+        img.convert('RGB').save(output_path, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+    else:
+        img.save(output_path, 'PNG', optimize=True)
     
     return True
@@ -2,10 +2,18 @@
 Admin Password Reset Script for Book Sales Website
 
 This script resets the admin password or creates a new admin user if one doesn't exist.
+
+With --bulk it instead reads "email,password[,name]" lines from stdin and
+creates or resets each of those users, hashing the passwords in parallel:
+
+    python reset_admin.py --bulk < users.csv
 """
 
 import os
 import sys
+import csv
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from werkzeug.security import generate_password_hash
 from flask import Flask
 from dotenv import load_dotenv
@@ -21,7 +29,7 @@ from database_schema import db, User
 
 # Create a minimal Flask app for database operations
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///booksales.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URI', 'sqlite:///booksales.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 
@@ -62,8 +70,53 @@ def reset_admin_password():
         else:
             print("Error: Admin user verification failed!")
 
+def bulk_set_passwords(lines):
+    """
+    Create or reset many users from "email,password[,name]" CSV lines.
+    
+    Password hashing (PBKDF2) is pure CPU work, so it is spread over all
+    cores with a process pool; the database is then updated in one commit.
+    Existing users keep their name and admin flag.
+    """
+    rows = [row for row in csv.reader(lines) if len(row) >= 2 and row[0].strip()]
+    if not rows:
+        print("No users given on stdin")
+        return
+    
+    emails = [row[0].strip() for row in rows]
+    passwords = [row[1] for row in rows]
+    names = [row[2].strip() if len(row) > 2 and row[2].strip() else email.split('@')[0]
+             for row, email in zip(rows, emails)]
+    
+    with ProcessPoolExecutor() as executor:
+        hashes = list(executor.map(generate_password_hash, passwords, chunksize=8))
+    
+    with app.app_context():
+        existing = {user.email: user for user in User.query.filter(User.email.in_(emails))}
+        created = 0
+        for email, name, hashed_password in zip(emails, names, hashes):
+            user = existing.get(email)
+            if user:
+                user.password = hashed_password
+            else:
+                user = User(email=email, password=hashed_password, name=name)
+                db.session.add(user)
+                existing[email] = user
+                created += 1
+        db.session.commit()
+    
+    print(f"Updated {len(rows) - created} user(s), created {created} user(s)")
+
 if __name__ == '__main__':
-    reset_admin_password()
-    print("\nYou can now log in with:")
-    print("Email: admin@example.com")
-    print("Password: admin123")
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bulk', action='store_true',
+                        help='read "email,password[,name]" lines from stdin')
+    args = parser.parse_args()
+    
+    if args.bulk:
+        bulk_set_passwords(sys.stdin)
+    else:
+        reset_admin_password()
+        print("\nYou can now log in with:")
+        print("Email: admin@example.com")
+        print("Password: admin123")
@@ -33,26 +33,23 @@ if 'users' not in Tables and 'user' not in Tables:
     sys.exit(0)
 
 table = 'users' if 'users' in Tables else 'user'
-cur.execute(f"PRAGMA table_info({table})")
-cols = [r[1] for r in cur.fetchall()]
+conn.row_factory = sqlite3.Row
+cur = conn.cursor()
 cur.execute(f"SELECT * FROM {table}")
-rows = cur.fetchall()
-
-users = []
-for row in rows:
-    d = dict(zip(cols, row))
-    if not args.include_passwords and 'password' in d:
-        d.pop('password')
-    users.append(d)
+cols = [d[0] for d in cur.description]
+fieldnames = [c for c in cols if args.include_passwords or c != 'password']
 
 if args.csv:
     import csv
+    # Stream rows straight from the cursor into the CSV file
+    count = 0
     with open(args.csv, 'w', newline='', encoding='utf-8') as fh:
-        if users:
-            writer = csv.DictWriter(fh, fieldnames=users[0].keys())
-            writer.writeheader()
-            for u in users:
-                writer.writerow(u)
-    print(json.dumps({'csv_written': args.csv, 'count': len(users)}))
+        writer = csv.DictWriter(fh, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in cur:
+            writer.writerow({k: row[k] for k in fieldnames})
+            count += 1
+    print(json.dumps({'csv_written': args.csv, 'count': count}))
 else:
+    users = [{k: row[k] for k in fieldnames} for row in cur]
     print(json.dumps(users, default=str, indent=2))
@@ -4,323 +4,276 @@ Test script for Book Sales Website
 This script tests the functionality of the Book Sales Website application.
 It includes tests for user authentication, book browsing, shopping cart,
 payment processing, and PDF downloads.
+
+The app, in-memory database and seed data come from the fixtures in
+conftest.py; every test runs in a transaction that is rolled back afterwards.
 """
 
 import os
 import sys
-import unittest
 import pytest
-from flask import session
+from sqlalchemy import func, select
 
-TEST_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'test_app.db')
-os.makedirs(os.path.dirname(TEST_DB_PATH), exist_ok=True)
-os.environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{TEST_DB_PATH}"
+# See conftest.py
+os.environ.setdefault('DATABASE_URI', 'sqlite://')
 
 from app import app, db
 from database_schema import User, Book, Order, OrderItem, Payment, Download
-from werkzeug.security import generate_password_hash
-from werkzeug.datastructures import FileStorage
 
 pytestmark = [pytest.mark.db, pytest.mark.web, pytest.mark.integration]
 
-class BookSalesWebsiteTestCase(unittest.TestCase):
-    """Test case for Book Sales Website"""
-
-    def _assert_safe_test_database(self):
-        with app.app_context():
-            database_path = os.path.normpath(str(db.engine.url.database or ''))
-        expected = os.path.normpath(TEST_DB_PATH)
-        if database_path != expected:
-            raise RuntimeError(
-                f"Unsafe test DB target. Expected '{expected}', got '{database_path}'."
-            )
-    
-    def setUp(self):
-        """Set up test environment"""
-        app.config['TESTING'] = True
-        app.config['WTF_CSRF_ENABLED'] = False
-        self._assert_safe_test_database()
-        self.client = app.test_client()
-        
-        # Create test directories
-        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-        os.makedirs(app.config['PDF_FOLDER'], exist_ok=True)
-        
-        # Create test database
-        with app.app_context():
-            db.session.remove()
-            db.drop_all()
-            db.create_all()
-            self._create_test_data()
-    
-    def tearDown(self):
-        """Clean up after tests"""
-        self._assert_safe_test_database()
-        with app.app_context():
-            db.session.remove()
-            db.drop_all()
-            db.engine.dispose()
-    
-    def _create_test_data(self):
-        """Create test data for the database"""
-        # Create test user
-        test_user = User(
-            email='test@example.com',
-            password=generate_password_hash('password'),
-            name='Test User'
+
+# The helpers don't follow redirects by default; pass follow_redirects=True
+# only where the test reads the flashed message from the next page.
+
+def _login(client, email='test@example.com', password='password', follow_redirects=False):
+    """Helper method to log in a user"""
+    return client.post('/login', data={
+        'email': email,
+        'password': password
+    }, follow_redirects=follow_redirects)
+
+def _logout(client, follow_redirects=False):
+    """Helper method to log out a user"""
+    return client.get('/logout', follow_redirects=follow_redirects)
+
+def _add_to_cart(client, book_id=1, follow_redirects=False):
+    """Helper method to add a book to the cart"""
+    return client.post(f'/cart/add/{book_id}', follow_redirects=follow_redirects)
+
+def test_home_page(client):
+    """Test home page loads correctly"""
+    response = client.get('/')
+    assert response.status_code == 200
+    assert b'Book Store' in response.data
+
+def test_book_list(client):
+    """Test book listing page loads correctly"""
+    response = client.get('/books')
+    assert response.status_code == 200
+    assert b'Test Book 1' in response.data
+    assert b'Test Book 2' in response.data
+
+def test_book_detail(client):
+    """Test book detail page loads correctly"""
+    response = client.get('/books/1')
+    assert response.status_code == 200
+    assert b'Test Book 1' in response.data
+    assert b'Test Author 1' in response.data
+
+def test_user_registration(client):
+    """Test user registration"""
+    response = client.post('/register', data={
+        'name': 'New User',
+        'email': 'new@example.com',
+        'password': 'newpassword'
+    }, follow_redirects=True)
+    assert response.status_code == 200
+    assert b'Registration successful' in response.data
+
+    # Check if user was created in database
+    with app.app_context():
+        user = User.query.filter_by(email='new@example.com').first()
+        assert user is not None
+        assert user.name == 'New User'
+
+def test_user_login_logout(client):
+    """Test user login and logout"""
+    # Test login
+    response = _login(client, follow_redirects=True)
+    assert response.status_code == 200
+    assert b'Login successful' in response.data
+
+    # Test logout
+    response = _logout(client, follow_redirects=True)
+    assert response.status_code == 200
+    assert b'You have been logged out' in response.data
+
+def test_cart_functionality(client):
+    """Test shopping cart functionality"""
+    # Login first
+    _login(client)
+
+    # Add book to cart
+    response = _add_to_cart(client, 1, follow_redirects=True)
+    assert response.status_code == 200
+    assert b'added to your cart' in response.data
+
+    # Check cart page
+    response = client.get('/cart')
+    assert response.status_code == 200
+    assert b'Test Book 1' in response.data
+    assert b'9.99' in response.data
+
+    # Update quantity
+    response = client.post('/cart/update/1', data={
+        'quantity': '2'
+    }, follow_redirects=True)
+    assert response.status_code == 200
+    assert b'Cart updated' in response.data
+
+    # Remove from cart
+    response = client.post('/cart/remove/1', follow_redirects=True)
+    assert response.status_code == 200
+    assert b'Item removed from cart' in response.data
+
+def test_checkout_page(client):
+    """Test checkout page requires login and shows cart items"""
+    # Try checkout without login
+    response = client.get('/checkout', follow_redirects=True)
+    assert b'Please log in to access this page' in response.data
+
+    # Login and add item to cart
+    response = _login(client)
+    assert response.status_code == 302
+    response = _add_to_cart(client, 1)
+    assert response.status_code == 302
+    assert response.location.endswith('/cart')
+
+    # Check checkout page
+    response = client.get('/checkout')
+    assert response.status_code == 200
+    assert b'Test Book 1' in response.data
+    assert b'9.99' in response.data
+    assert b'Proceed to Payment' in response.data
+
+def test_payment_creation(client):
+    """Test payment creation API endpoint"""
+    # Login and add item to cart
+    _login(client)
+    _add_to_cart(client, 1)
+
+    # Test payment creation
+    response = client.post('/create-payment')
+    assert response.status_code in (200, 400, 500)
+
+    payload = response.get_json()
+    assert isinstance(payload, dict)
+
+    if response.status_code == 200:
+        assert 'approval_url' in payload
+    else:
+        assert 'error' in payload
+
+def test_order_completion_page(client, seed):
+    """Test order completion page with mock order"""
+    # Login
+    _login(client)
+
+    # Create a test order directly in the database
+    with app.app_context():
+        # Create order
+        order = Order(
+            user_id=seed.user_id,
+            total_amount=seed.book_price,
+            status='completed'
+        )
+
+        # Order item and payment are attached through the relationships, so
+        # one commit inserts all three rows in dependency order
+        order_item = OrderItem(
+            order=order,
+            book_id=seed.book_id,
+            quantity=1,
+            price=seed.book_price
+        )
+        payment = Payment(
+            order=order,
+            amount=seed.book_price,
+            payment_method='paypal',
+            transaction_id='test_transaction',
+            status='completed'
         )
-        db.session.add(test_user)
-        
-        # Create test books
-        test_book1 = Book(
-            title='Test Book 1',
-            author='Test Author 1',
-            description='This is a test book 1',
-            price=9.99,
-            pdf_file='test_book1.pdf',
-            is_available=True
+        db.session.add_all([order, order_item, payment])
+        db.session.commit()
+
+        order_id = order.id
+
+    # Test order completion page
+    response = client.get(f'/order-complete/{order_id}')
+    assert response.status_code == 200
+    assert b'Thank You for Your Purchase' in response.data
+    assert b'Download PDF' in response.data
+
+def test_download_protection(client, seed):
+    """Test that downloads are protected and require purchase"""
+    # Login
+    _login(client)
+
+    # Try to download without purchase
+    response = client.get(f'/download/{seed.book_id}/999')
+    assert response.status_code == 403  # Should be forbidden
+
+    # Create a test order with purchase
+    with app.app_context():
+        # Create order
+        order = Order(
+            user_id=seed.user_id,
+            total_amount=seed.book_price,
+            status='completed'
         )
-        
-        test_book2 = Book(
-            title='Test Book 2',
-            author='Test Author 2',
-            description='This is a test book 2',
-            price=14.99,
-            pdf_file='test_book2.pdf',
-            is_available=True
+
+        # Add order item
+        order_item = OrderItem(
+            order=order,
+            book_id=seed.book_id,
+            quantity=1,
+            price=seed.book_price
         )
-        
-        db.session.add(test_book1)
-        db.session.add(test_book2)
-        
-        # Create test PDF files
-        with open(os.path.join(app.config['PDF_FOLDER'], 'test_book1.pdf'), 'w') as f:
-            f.write('Test PDF content for book 1')
-        
-        with open(os.path.join(app.config['PDF_FOLDER'], 'test_book2.pdf'), 'w') as f:
-            f.write('Test PDF content for book 2')
-        
+        db.session.add_all([order, order_item])
         db.session.commit()
-    
-    def _login(self, email='test@example.com', password='password'):
-        """Helper method to log in a user"""
-        return self.client.post('/login', data={
-            'email': email,
-            'password': password
-        }, follow_redirects=True)
-    
-    def _logout(self):
-        """Helper method to log out a user"""
-        return self.client.get('/logout', follow_redirects=True)
-    
-    def _add_to_cart(self, book_id=1):
-        """Helper method to add a book to the cart"""
-        return self.client.post(f'/cart/add/{book_id}', follow_redirects=True)
-    
-    def test_home_page(self):
-        """Test home page loads correctly"""
-        response = self.client.get('/')
-        self.assertEqual(response.status_code, 200)
-        self.assertIn(b'Book Store', response.data)
-    
-    def test_book_list(self):
-        """Test book listing page loads correctly"""
-        response = self.client.get('/books')
-        self.assertEqual(response.status_code, 200)
-        self.assertIn(b'Test Book 1', response.data)
-        self.assertIn(b'Test Book 2', response.data)
-    
-    def test_book_detail(self):
-        """Test book detail page loads correctly"""
-        response = self.client.get('/books/1')
-        self.assertEqual(response.status_code, 200)
-        self.assertIn(b'Test Book 1', response.data)
-        self.assertIn(b'Test Author 1', response.data)
-    
-    def test_user_registration(self):
-        """Test user registration"""
-        response = self.client.post('/register', data={
-            'name': 'New User',
-            'email': 'new@example.com',
-            'password': 'newpassword'
-        }, follow_redirects=True)
-        self.assertEqual(response.status_code, 200)
-        self.assertIn(b'Registration successful', response.data)
-        
-        # Check if user was created in database
-        with app.app_context():
-            user = User.query.filter_by(email='new@example.com').first()
-            self.assertIsNotNone(user)
-            self.assertEqual(user.name, 'New User')
-    
-    def test_user_login_logout(self):
-        """Test user login and logout"""
-        # Test login
-        response = self._login()
-        self.assertEqual(response.status_code, 200)
-        self.assertIn(b'Login successful', response.data)
-        
-        # Test logout
-        response = self._logout()
-        self.assertEqual(response.status_code, 200)
-        self.assertIn(b'You have been logged out', response.data)
-    
-    def test_cart_functionality(self):
-        """Test shopping cart functionality"""
-        # Login first
-        self._login()
-        
-        # Add book to cart
-        response = self._add_to_cart(1)
-        self.assertEqual(response.status_code, 200)
-        self.assertIn(b'added to your cart', response.data)
-        
-        # Check cart page
-        response = self.client.get('/cart')
-        self.assertEqual(response.status_code, 200)
-        self.assertIn(b'Test Book 1', response.data)
-        self.assertIn(b'9.99', response.data)
-        
-        # Update quantity
-        response = self.client.post('/cart/update/1', data={
-            'quantity': '2'
-        }, follow_redirects=True)
-        self.assertEqual(response.status_code, 200)
-        self.assertIn(b'Cart updated', response.data)
-        
-        # Remove from cart
-        response = self.client.post('/cart/remove/1', follow_redirects=True)
-        self.assertEqual(response.status_code, 200)
-        self.assertIn(b'Item removed from cart', response.data)
-    
-    def test_checkout_page(self):
-        """Test checkout page requires login and shows cart items"""
-        # Try checkout without login
-        response = self.client.get('/checkout', follow_redirects=True)
-        self.assertIn(b'Please log in to access this page', response.data)
-        
-        # Login and add item to cart
-        self._login()
-        self._add_to_cart(1)
-        
-        # Check checkout page
-        response = self.client.get('/checkout')
-        self.assertEqual(response.status_code, 200)
-        self.assertIn(b'Test Book 1', response.data)
-        self.assertIn(b'9.99', response.data)
-        self.assertIn(b'Proceed to Payment', response.data)
-    
-    def test_payment_creation(self):
-        """Test payment creation API endpoint"""
-        # Login and add item to cart
-        self._login()
-        self._add_to_cart(1)
-        
-        # Test payment creation
-        response = self.client.post('/create-payment')
-        self.assertIn(response.status_code, (200, 400, 500))
-
-        payload = response.get_json()
-        self.assertIsInstance(payload, dict)
-
-        if response.status_code == 200:
-            self.assertIn('approval_url', payload)
-        else:
-            self.assertIn('error', payload)
-    
-    def test_order_completion_page(self):
-        """Test order completion page with mock order"""
-        # Login
-        self._login()
-        
-        # Create a test order directly in the database
-        with app.app_context():
-            user = User.query.filter_by(email='test@example.com').first()
-            book = Book.query.first()
-            
-            # Create order
-            order = Order(
-                user_id=user.id,
-                total_amount=book.price,
-                status='completed'
-            )
-            db.session.add(order)
-            db.session.flush()
-            
-            # Add order item
-            order_item = OrderItem(
-                order_id=order.id,
-                book_id=book.id,
-                quantity=1,
-                price=book.price
-            )
-            db.session.add(order_item)
-            
-            # Add payment
-            payment = Payment(
-                order_id=order.id,
-                amount=book.price,
-                payment_method='paypal',
-                transaction_id='test_transaction',
-                status='completed'
-            )
-            db.session.add(payment)
-            db.session.commit()
-            
-            order_id = order.id
-        
-        # Test order completion page
-        response = self.client.get(f'/order-complete/{order_id}')
-        self.assertEqual(response.status_code, 200)
-        self.assertIn(b'Thank You for Your Purchase', response.data)
-        self.assertIn(b'Download PDF', response.data)
-    
-    def test_download_protection(self):
-        """Test that downloads are protected and require purchase"""
-        # Login
-        self._login()
-        
-        # Try to download without purchase
-        response = self.client.get('/download/1/999', follow_redirects=True)
-        self.assertEqual(response.status_code, 403)  # Should be forbidden
-        
-        # Create a test order with purchase
-        with app.app_context():
-            user = User.query.filter_by(email='test@example.com').first()
-            book = Book.query.first()
-            
-            # Create order
-            order = Order(
-                user_id=user.id,
-                total_amount=book.price,
-                status='completed'
-            )
-            db.session.add(order)
-            db.session.flush()
-            
-            # Add order item
-            order_item = OrderItem(
-                order_id=order.id,
-                book_id=book.id,
-                quantity=1,
-                price=book.price
-            )
-            db.session.add(order_item)
-            db.session.commit()
-            
-            order_id = order.id
-        
-        # Try to download with valid purchase
-        response = self.client.get(f'/download/1/{order_id}')
-        self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.headers['Content-Type'], 'application/pdf')
-        self.assertIn('attachment; filename=', response.headers['Content-Disposition'])
-        
-        # Check that download was recorded - using a fresh session
-        with app.app_context():
-            db.session.expire_all()  # Refresh session
-            download_count = Download.query.filter_by(order_id=order_id).count()
-            self.assertGreater(download_count, 0)
+
+        order_id = order.id
+
+    # Try to download with valid purchase
+    response = client.get(f'/download/{seed.book_id}/{order_id}')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/pdf'
+    assert 'attachment; filename=' in response.headers['Content-Disposition']
+
+    # Check that download was recorded (a Core count, so nothing stale from
+    # the identity map is involved)
+    with app.app_context():
+        download_count = db.session.execute(
+            select(func.count()).select_from(Download).where(Download.order_id == order_id)
+        ).scalar()
+        assert download_count > 0
+
+def test_download_accel_redirect(client, seed, monkeypatch):
+    """Behind nginx the download is an empty X-Accel-Redirect response"""
+    monkeypatch.setitem(app.config, 'PDF_ACCEL_REDIRECT_PREFIX', '/protected-pdfs/')
+    _login(client)
+
+    # Purchased book with a non-ASCII title
+    with app.app_context():
+        db.session.get(Book, seed.book_id).title = 'Café Guide'
+        order = Order(
+            user_id=seed.user_id,
+            total_amount=seed.book_price,
+            status='completed'
+        )
+        order_item = OrderItem(
+            order=order,
+            book_id=seed.book_id,
+            quantity=1,
+            price=seed.book_price
+        )
+        db.session.add_all([order, order_item])
+        db.session.commit()
+
+        order_id = order.id
+
+    response = client.get(f'/download/{seed.book_id}/{order_id}')
+    assert response.status_code == 200
+    assert response.data == b''
+    assert response.headers['Content-Type'] == 'application/pdf'
+    assert response.headers['X-Accel-Redirect'] == '/protected-pdfs/test_book1.pdf'
+
+    # ASCII fallback plus the RFC 5987 UTF-8 name, as send_file writes them
+    disposition = response.headers['Content-Disposition']
+    assert disposition.startswith('attachment;')
+    assert 'filename="Cafe Guide.pdf"' in disposition
+    assert "filename*=UTF-8''Caf%C3%A9%20Guide.pdf" in disposition
 
 if __name__ == '__main__':
-    unittest.main()
+    sys.exit(pytest.main([__file__]))
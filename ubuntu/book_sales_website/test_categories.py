@@ -4,72 +4,54 @@ Test script to verify category field is working correctly in the database
 """
 
 import os
+import sys
 import pytest
 
-TEST_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'test_misc.db')
-os.makedirs(os.path.dirname(TEST_DB_PATH), exist_ok=True)
-os.environ.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{TEST_DB_PATH}")
+# See conftest.py
+os.environ.setdefault('DATABASE_URI', 'sqlite://')
 
-from app import app, db
+from app import db
 from database_schema import Book
 
-pytestmark = [pytest.mark.db, pytest.mark.integration]
+# 'session' before 'app_ctx': popping the context at teardown then closes the
+# test's rolled-back session, so nothing these tests commit outlives them
+pytestmark = [pytest.mark.db, pytest.mark.integration, pytest.mark.usefixtures('session', 'app_ctx')]
 
 
-def _seed_book_if_needed():
-    if Book.query.count() == 0:
-        db.session.add(
-            Book(
-                title='Category Test Book',
-                author='Test Author',
-                description='Seed data for category tests',
-                price=1.0,
-                category='programming',
-                pdf_file='category_test.pdf',
-                is_available=True,
-            )
-        )
-        db.session.commit()
-
-def test_categories():
+def test_categories(seed):
     """Test category field functionality"""
-    with app.app_context():
-        db.create_all()
-        _seed_book_if_needed()
-
-        print("=== Book Categories Test ===")
-        
-        # Get all books and show their categories
-        books = Book.query.all()
-        print(f"\nFound {len(books)} books in database:")
-        
-        for book in books:
-            category = getattr(book, 'category', 'NO_CATEGORY_FIELD')
-            print(f"ID: {book.id} | Title: {book.title[:30]}... | Category: {category}")
-        
-        # Test if we can update a category
-        if books:
-            test_book = books[0]
-            old_category = getattr(test_book, 'category', None)
-            print(f"\n=== Testing Category Update ===")
-            print(f"Book: {test_book.title}")
-            print(f"Current category: {old_category}")
-            
-            # Update to test_automation
-            test_book.category = 'test_automation'
-            db.session.commit()
-            
-            # Verify the update
-            updated_book = db.session.get(Book, test_book.id)
-            new_category = getattr(updated_book, 'category', None)
-            print(f"Updated category: {new_category}")
-            
-            # Restore original category
-            test_book.category = old_category or 'programming'
-            db.session.commit()
-            print(f"Restored to: {test_book.category}")
-            
-        print("\n=== Category Field Test Complete ===")
+    print("=== Book Categories Test ===")
+    
+    # Stream the books in batches and show their categories; only the first
+    # one is kept for the update test
+    test_book = None
+    lines = []
+    for book in Book.query.enable_eagerloads(False).yield_per(100):
+        if test_book is None:
+            test_book = book
+        category = getattr(book, 'category', 'NO_CATEGORY_FIELD')
+        lines.append(f"ID: {book.id} | Title: {book.title[:30]}... | Category: {category}")
+    lines.append(f"\nFound {len(lines)} books in database")
+    sys.stdout.write('\n'.join(lines) + '\n')
+    
+    # Test if we can update a category (the session fixture rolls it back)
+    assert test_book is not None
+    old_category = getattr(test_book, 'category', None)
+    print(f"\n=== Testing Category Update ===")
+    print(f"Book: {test_book.title}")
+    print(f"Current category: {old_category}")
+    
+    # Update to test_automation
+    test_book.category = 'test_automation'
+    db.session.commit()
+    
+    # Verify the update (reload only the committed column)
+    db.session.refresh(test_book, ['category'])
+    new_category = test_book.category
+    print(f"Updated category: {new_category}")
+    assert new_category == 'test_automation'
+    
+    print("\n=== Category Field Test Complete ===")
 
 if __name__ == "__main__":
-    test_categories()
\ No newline at end of file
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,143 @@
+"""
+Tests for the PDF helper module
+
+Covers the hash-keyed metadata cache around extract_pdf_metadata, its
+first-page author fallback, and batched OCR with ocr_pages. Tesseract itself
+is replaced by a recorder, so these run without the binary installed.
+"""
+
+import os
+import sqlite3
+import sys
+from contextlib import closing
+from types import SimpleNamespace
+
+import pytest
+
+import pdf_helpers
+from pdf_helpers import extract_pdf_metadata, ocr_pages
+
+fitz = pytest.importorskip('fitz')
+
+
+@pytest.fixture
+def metadata_cache(tmp_path, monkeypatch):
+    """Point the metadata cache at a fresh file; OCR off for stable results"""
+    cache_path = tmp_path / 'pdf_meta.cache'
+    monkeypatch.setattr(pdf_helpers, 'METADATA_CACHE_PATH', str(cache_path))
+    monkeypatch.setattr(pdf_helpers, 'OCR_AVAILABLE', False)
+    return cache_path
+
+
+def _cached_rows(cache_path):
+    if not cache_path.exists():
+        return 0
+    with closing(sqlite3.connect(cache_path)) as conn:
+        return conn.execute('SELECT COUNT(*) FROM pdf_meta_cache').fetchone()[0]
+
+
+def test_complete_result_is_cached(tmp_path, make_pdf, metadata_cache):
+    """A clean extraction is stored and served from the cache afterwards"""
+    pdf_path = make_pdf(tmp_path / 'book.pdf')
+
+    first = extract_pdf_metadata(pdf_path)
+    assert first['pages'] == 1
+    assert _cached_rows(metadata_cache) == 1
+
+    assert extract_pdf_metadata(pdf_path) == first
+
+
+def test_failed_open_is_not_cached(tmp_path, metadata_cache):
+    """A PDF that cannot be opened gets empty metadata that is not kept"""
+    pdf_path = tmp_path / 'broken.pdf'
+    pdf_path.write_bytes(b'not a pdf')
+
+    assert extract_pdf_metadata(str(pdf_path))['pages'] == 0
+    assert _cached_rows(metadata_cache) == 0
+
+
+def test_partial_result_is_not_cached(tmp_path, make_pdf, metadata_cache, monkeypatch):
+    """A failure inside the extraction leaves the file uncached"""
+    pdf_path = make_pdf(tmp_path / 'book.pdf')
+
+    def failing_lines(page):
+        raise RuntimeError('boom')
+
+    # Breaks the description scan, which logs the error and carries on
+    monkeypatch.setattr(pdf_helpers, '_text_block_lines', failing_lines)
+    assert extract_pdf_metadata(pdf_path)['description'] == ''
+    assert _cached_rows(metadata_cache) == 0
+
+
+def test_hash_failure_runs_uncached(tmp_path, make_pdf, metadata_cache, monkeypatch):
+    """An unexpected error while hashing falls back to plain extraction"""
+    pdf_path = make_pdf(tmp_path / 'book.pdf')
+
+    def broken_hash(path):
+        raise AttributeError('file_digest')
+
+    monkeypatch.setattr(pdf_helpers, 'file_sha256', broken_hash)
+    assert extract_pdf_metadata(pdf_path)['pages'] == 1
+    assert _cached_rows(metadata_cache) == 0
+
+
+def test_author_fallback_survives_failed_metadata_pass(tmp_path, make_pdf, metadata_cache, monkeypatch):
+    """The first page is still searched for authors when the main pass fails"""
+    pdf_path = make_pdf(tmp_path / 'book.pdf', 'Jane Doe')
+
+    class FailingPattern:
+        def search(self, text):
+            raise RuntimeError('boom')
+
+    monkeypatch.setattr(pdf_helpers, '_ISBN_RE', FailingPattern())
+    assert extract_pdf_metadata(pdf_path)['author'] == 'Jane Doe'
+
+
+@pytest.fixture
+def fake_tesseract(monkeypatch):
+    """
+    Replace pytesseract.image_to_string with a recorder: set ``output`` to
+    the text it should return; ``calls`` holds the image list of each run
+    """
+    pytesseract = pytest.importorskip('pytesseract')
+    fake = SimpleNamespace(output='', calls=[])
+
+    def image_to_string(list_path):
+        with open(list_path, encoding='utf-8') as f:
+            fake.calls.append(f.read().split())
+        return fake.output
+
+    monkeypatch.setattr(pytesseract, 'image_to_string', image_to_string)
+    return fake
+
+
+def test_ocr_pages_runs_tesseract_once(tmp_path, make_pdf, fake_tesseract):
+    """All pages go to one Tesseract run and come back split per page"""
+    fake_tesseract.output = 'second\x0cthird\x0cfourth\x0c'
+    pdf_path = make_pdf(tmp_path / 'book.pdf', *[f'Page {n}' for n in range(1, 6)])
+    doc = fitz.open(pdf_path)
+
+    assert ocr_pages(doc, [1, 2, 3]) == ['second', 'third', 'fourth']
+    assert len(fake_tesseract.calls) == 1
+    assert [os.path.basename(p) for p in fake_tesseract.calls[0]] == ['page_2.png', 'page_3.png', 'page_4.png']
+    doc.close()
+
+
+def test_ocr_pages_pads_or_trims_to_requested_pages(tmp_path, make_pdf, fake_tesseract):
+    """A page count mismatch in Tesseract's output never shifts the results"""
+    pdf_path = make_pdf(tmp_path / 'book.pdf', *[f'Page {n}' for n in range(1, 4)])
+    doc = fitz.open(pdf_path)
+
+    fake_tesseract.output = 'only one page'
+    assert ocr_pages(doc, [0, 1, 2]) == ['only one page', '', '']
+
+    fake_tesseract.output = 'a\x0cb\x0cc\x0c'
+    assert ocr_pages(doc, [0, 1]) == ['a', 'b']
+
+    assert ocr_pages(doc, []) == []
+    assert len(fake_tesseract.calls) == 2
+    doc.close()
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__]))
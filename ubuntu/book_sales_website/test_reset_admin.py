@@ -0,0 +1,58 @@
+"""
+Tests for the reset_admin script's --bulk mode
+
+The script's own app gets a private in-memory database (reset_admin_db
+fixture in conftest.py).
+"""
+
+import io
+import os
+import sys
+
+import pytest
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# See conftest.py
+os.environ.setdefault('DATABASE_URI', 'sqlite://')
+
+from reset_admin import bulk_set_passwords
+from database_schema import db, User
+
+pytestmark = pytest.mark.db
+
+
+def test_bulk_creates_and_resets_users(reset_admin_db, capsys):
+    """New users are created, existing ones only get a new password"""
+    db.session.add(User(email='old@example.com', password=generate_password_hash('before'),
+                        name='Old Name', is_admin=True))
+    db.session.commit()
+
+    bulk_set_passwords(io.StringIO(
+        "old@example.com,after\n"
+        "new@example.com,secret,New Person\n"
+        "short@example.com,pw\n"
+        "bad-row-without-password\n"
+    ))
+    db.session.expire_all()
+
+    old_user = User.query.filter_by(email='old@example.com').one()
+    assert check_password_hash(old_user.password, 'after')
+    assert old_user.name == 'Old Name' and old_user.is_admin
+
+    new_user = User.query.filter_by(email='new@example.com').one()
+    assert check_password_hash(new_user.password, 'secret')
+    assert new_user.name == 'New Person'
+
+    assert User.query.filter_by(email='short@example.com').one().name == 'short'
+    assert User.query.count() == 3
+    assert 'Updated 1 user(s), created 2 user(s)' in capsys.readouterr().out
+
+
+def test_bulk_with_no_rows_changes_nothing(reset_admin_db, capsys):
+    bulk_set_passwords(io.StringIO("\n,missing-email\n"))
+    assert User.query.count() == 0
+    assert 'No users given on stdin' in capsys.readouterr().out
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__]))
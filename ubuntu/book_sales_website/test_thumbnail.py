@@ -1,39 +1,120 @@
 """
 Test PDF Thumbnail Generation
 
-This script tests the thumbnail generation functionality.
+This script tests the thumbnail generation functionality. Run directly it
+reports which PDF libraries are installed; under pytest it checks the
+thumbnail cache.
 """
 
 import os
 import sys
+from collections import namedtuple
+from functools import lru_cache
+
+import pytest
 
 # Add the current directory to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+import pdf_thumbnail
 from pdf_thumbnail import generate_pdf_thumbnail
 
-# Test if PyMuPDF is available
-try:
-    import fitz
-    print("✓ PyMuPDF (fitz) is installed")
-    print(f"  Version: {fitz.version}")
-except ImportError:
-    print("✗ PyMuPDF (fitz) is NOT installed")
-
-# Test if pdf2image is available
-try:
-    from pdf2image import convert_from_path
-    print("✓ pdf2image is installed")
-except ImportError:
-    print("✗ pdf2image is NOT installed")
-
-# Test if Pillow is available
-try:
-    from PIL import Image
-    print("✓ Pillow (PIL) is installed")
-    print(f"  Version: {Image.__version__ if hasattr(Image, '__version__') else 'Unknown'}")
-except ImportError:
-    print("✗ Pillow (PIL) is NOT installed")
-
-print("\nThumbnail generation is ready to use!")
-print("When you upload a PDF without a cover image, a thumbnail will be automatically generated.")
+ThumbnailDeps = namedtuple('ThumbnailDeps', 'has_fitz has_pdf2image has_pil versions')
+
+
+@lru_cache(maxsize=1)
+def _probe_thumbnail_deps():
+    """Import the thumbnail backends once and report which are available"""
+    versions = {}
+
+    try:
+        import fitz
+        has_fitz = True
+        versions['fitz'] = fitz.version
+    except ImportError:
+        has_fitz = False
+
+    try:
+        from pdf2image import convert_from_path
+        has_pdf2image = True
+    except ImportError:
+        has_pdf2image = False
+
+    try:
+        from PIL import Image
+        has_pil = True
+        versions['PIL'] = getattr(Image, '__version__', 'Unknown')
+    except ImportError:
+        has_pil = False
+
+    return ThumbnailDeps(has_fitz, has_pdf2image, has_pil, versions)
+
+
+@pytest.fixture
+def thumb_cache(tmp_path, monkeypatch):
+    """Point the thumbnail cache at an empty folder"""
+    pytest.importorskip('fitz')
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setattr(pdf_thumbnail, 'THUMBNAIL_CACHE_DIR', str(cache_dir))
+    return cache_dir
+
+
+def test_thumbnail_outputs_are_independent_copies(tmp_path, make_pdf, thumb_cache):
+    """Two covers rendered from the same PDF share a cache entry, not a file"""
+    pdf_path = make_pdf(tmp_path / 'book.pdf', 'Cover')
+    first = tmp_path / 'first_thumb.jpg'
+    second = tmp_path / 'second_thumb.jpg'
+
+    assert generate_pdf_thumbnail(pdf_path, str(first))
+    assert generate_pdf_thumbnail(pdf_path, str(second))
+
+    assert len(list(thumb_cache.iterdir())) == 1
+    assert first.read_bytes() == second.read_bytes()
+    assert not os.path.samefile(first, second)
+
+    first.write_bytes(b'changed')
+    assert second.read_bytes() == next(thumb_cache.iterdir()).read_bytes()
+
+
+def test_thumbnail_cache_is_bounded(tmp_path, make_pdf, thumb_cache, monkeypatch):
+    """Only the most recently used entries are kept"""
+    monkeypatch.setattr(pdf_thumbnail, 'THUMBNAIL_CACHE_MAX_ENTRIES', 2)
+
+    pdf_hashes = []
+    for i in range(3):
+        pdf_path = make_pdf(tmp_path / f'book{i}.pdf', f'Cover {i}')
+        pdf_hashes.append(pdf_thumbnail.file_sha256(pdf_path))
+        assert generate_pdf_thumbnail(pdf_path, str(tmp_path / f'thumb{i}.jpg'))
+        # mtime resolution can be coarse; space the entries out explicitly
+        for entry in thumb_cache.iterdir():
+            os.utime(entry, (entry.stat().st_atime, entry.stat().st_mtime - 10))
+
+    cached = sorted(entry.name.split('_')[0] for entry in thumb_cache.iterdir())
+    assert cached == sorted(pdf_hashes[1:])
+
+
+if __name__ == '__main__':
+    deps = _probe_thumbnail_deps()
+
+    # Test if PyMuPDF is available
+    if deps.has_fitz:
+        print("✓ PyMuPDF (fitz) is installed")
+        print(f"  Version: {deps.versions['fitz']}")
+    else:
+        print("✗ PyMuPDF (fitz) is NOT installed")
+
+    # Test if pdf2image is available
+    if deps.has_pdf2image:
+        print("✓ pdf2image is installed")
+    else:
+        print("✗ pdf2image is NOT installed")
+
+    # Test if Pillow is available
+    if deps.has_pil:
+        print("✓ Pillow (PIL) is installed")
+        print(f"  Version: {deps.versions['PIL']}")
+    else:
+        print("✗ Pillow (PIL) is NOT installed")
+
+    print("\nThumbnail generation is ready to use!")
+    print("When you upload a PDF without a cover image, a thumbnail will be automatically generated.")
@@ -6,41 +6,45 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from sqlalchemy import exists, select, update
+from sqlalchemy.orm import aliased
+
 from database_schema import db, User
 from app import app
 
+OLD_EMAIL = 'John.Doe998@personal.example.com'
+NEW_EMAIL = 'irluk2011@outlook.com'
+
 def update_john_doe_email():
     """Update John Doe email from 998 to 997"""
     with app.app_context():
-        # Find the existing user
-        old_user = User.query.filter_by(email='John.Doe998@personal.example.com').first()
+        # Rename in one statement, only if the target email is still free
+        other_user = aliased(User)
+        stmt = (
+            update(User)
+            .where(User.email == OLD_EMAIL)
+            .where(~exists().where(other_user.email == NEW_EMAIL))
+            .values(email=NEW_EMAIL)
+        )
         
-        if old_user:
-            print(f"Found user: {old_user.email} ({old_user.name})")
-            
-            # Check if target email already exists
-            existing_997 = User.query.filter_by(email='irluk2011@outlook.com').first()
-            if existing_997:
-                print("ERROR: irluk2011@outlook.com already exists!")
-                return
-            
-            # Update the email
-            old_user.email = 'irluk2011@outlook.com'
-            
-            try:
-                db.session.commit()
-                print("SUCCESS: Updated email from John.Doe998@personal.example.com to irluk2011@outlook.com")
-            except Exception as e:
-                db.session.rollback()
-                print(f"ERROR: Failed to update email - {e}")
+        try:
+            result = db.session.execute(stmt)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"ERROR: Failed to update email - {e}")
         else:
-            print("ERROR: John.Doe998@personal.example.com not found in database")
+            if result.rowcount:
+                print(f"SUCCESS: Updated email from {OLD_EMAIL} to {NEW_EMAIL}")
+            elif not db.session.scalar(select(exists().where(User.email == OLD_EMAIL))):
+                print(f"ERROR: {OLD_EMAIL} not found in database")
+            else:
+                print(f"ERROR: {NEW_EMAIL} already exists!")
         
         # Show all users after update
         print("\nUsers after update:")
-        all_users = User.query.all()
-        for user in all_users:
-            print(f"  - {user.email} ({user.name})")
+        for email, name in db.session.execute(select(User.email, User.name)):
+            print(f"  - {email} ({name})")
 
 if __name__ == '__main__':
-    update_john_doe_email()
\ No newline at end of file
+    update_john_doe_email()
@@ -6,37 +6,50 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app import app
+from sqlalchemy import func, select
+
+from app import app, db
 from database_schema import Book
 
+_BOOK_TEMPLATE = """📖 Book ID {id}:
+   Title: {title}
+   Author: {author}
+   Category: {category}
+   Price: ${price}
+"""
+
 def verify_books():
     """Verify the metadata for Books 5 and 6"""
     with app.app_context():
-        books = Book.query.filter(Book.id.in_([5, 6])).all()
+        book_ids = [5, 6]
+        # Only the printed columns, as plain rows
+        rows = db.session.execute(
+            select(Book.id, Book.title, Book.author, Book.category, Book.price)
+            .where(Book.id.in_(book_ids))
+            .order_by(Book.id)
+        ).all()
         
-        print("📚 Sahih al-Bukhari Volumes Metadata Verification:")
-        print("=" * 60)
-        
-        for book in sorted(books, key=lambda x: x.id):
-            print(f"📖 Book ID {book.id}:")
-            print(f"   Title: {book.title}")
-            print(f"   Author: {book.author}")
-            print(f"   Category: {book.category}")
-            print(f"   Price: ${book.price}")
-            print()
+        # Build the whole report and write it once
+        lines = ["📚 Sahih al-Bukhari Volumes Metadata Verification:", "=" * 60]
+        lines.extend(_BOOK_TEMPLATE.format(**row._asdict()) for row in rows)
             
         # Check if both are consistently categorized as Islamic books
-        islamic_books = [book for book in books if book.category == 'islamic']
-        programming_books = [book for book in books if book.category == 'programming']
+        category_counts = dict(db.session.execute(
+            select(Book.category, func.count())
+            .where(Book.id.in_(book_ids))
+            .group_by(Book.category)
+        ).all())
         
-        print("🔍 Category Analysis:")
-        print(f"   Islamic category: {len(islamic_books)} books")
-        print(f"   Programming category: {len(programming_books)} books")
+        lines.append("🔍 Category Analysis:")
+        lines.append(f"   Islamic category: {category_counts.get('islamic', 0)} books")
+        lines.append(f"   Programming category: {category_counts.get('programming', 0)} books")
         
-        if len(islamic_books) == 2:
-            print("✅ Both Sahih al-Bukhari volumes are properly categorized as Islamic!")
+        if category_counts.get('islamic', 0) == 2:
+            lines.append("✅ Both Sahih al-Bukhari volumes are properly categorized as Islamic!")
         else:
-            print("⚠️  Category inconsistency detected!")
+            lines.append("⚠️  Category inconsistency detected!")
+        
+        sys.stdout.write('\n'.join(lines) + '\n')
 
 if __name__ == "__main__":
     verify_books()
\ No newline at end of file